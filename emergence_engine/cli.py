@@ -1,11 +1,19 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
 
 from .engine import EmergenceEngine
+from .jsonio import write_json
+
+# Every kind the detector can emit, in the order summaries list them
+_EVENT_KINDS = ("dissolution", "emergence")
+
+
+def _event_kinds(events: list[dict]) -> list[str]:
+    """Kinds that occur in `events`; each check stops at the first match."""
+    return [kind for kind in _EVENT_KINDS if any(e["kind"] == kind for e in events)]
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
@@ -26,6 +34,7 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     p.add_argument("--summary", action="store_true", help="Print concise summary fields only")
     p.add_argument("--sliding-window", type=int, help="Analyze with sliding windows of this token length")
     p.add_argument("--sliding-step", type=int, default=0, help="Step between windows (default: window/2)")
+    p.add_argument("--workers", type=int, default=1, help="Processes for --sliding-window compression (0 = one per CPU)")
     p.add_argument("--min-persistence", type=int, default=2, help="Emergence: min consecutive steps above threshold")
     p.add_argument("--hysteresis", type=float, default=0.1, help="Emergence: hysteresis margin to end events")
     p.add_argument("--min-gap", type=int, default=2, help="Emergence: minimum gap between events")
@@ -59,6 +68,7 @@ def main(argv: list[str] | None = None) -> int:
             min_persistence=args.min_persistence,
             hysteresis=args.hysteresis,
             min_gap=args.min_gap,
+            workers=args.workers,
         )
     else:
         result = engine.process(
@@ -109,7 +119,7 @@ def main(argv: list[str] | None = None) -> int:
             }
             payload["events_summary"] = {
                 "count": len(result.events or []),
-                "kinds": sorted({e.get("kind") for e in (result.events or [])}),
+                "kinds": _event_kinds(result.events or []),
                 "indices": [e.get("index") for e in (result.events or [])][:10],
             }
         else:
@@ -128,7 +138,7 @@ def main(argv: list[str] | None = None) -> int:
             }
             payload["window_events_summary"] = {
                 "count": len(result.window_events or []),
-                "kinds": sorted({e.get("kind") for e in (result.window_events or [])}),
+                "kinds": _event_kinds(result.window_events or []),
                 "indices": [e.get("index") for e in (result.window_events or [])][:10],
             }
         else:
@@ -138,30 +148,21 @@ def main(argv: list[str] | None = None) -> int:
 
         # Optional exports
         if args.export_graphviz:
-            from .viz import grammar_to_dot
+            from .viz import write_dot
             try:
-                from .grammar import Grammar
-                g = Grammar()
-                for lhs, rhs in result.rules.items():
-                    g.add_rule(lhs, list(rhs))
-                Path(args.export_graphviz).write_text(grammar_to_dot(g), encoding="utf-8")
+                with open(args.export_graphviz, "w", encoding="utf-8") as fp:
+                    write_dot(result.grammar, fp)
             except Exception as e:
                 print(f"Warning: failed to export GraphViz: {e}", file=sys.stderr)
         if args.export_plotly and payload.get("entropies") and payload.get("mdl_trajectory"):
             from .viz import trajectory_to_plotly_json
             try:
-                import json as _json
-                Path(args.export_plotly).write_text(
-                    _json.dumps(trajectory_to_plotly_json(payload["entropies"], payload["mdl_trajectory"]), indent=2),
-                    encoding="utf-8",
-                )
+                with open(args.export_plotly, "w", encoding="utf-8") as fp:
+                    write_json(trajectory_to_plotly_json(payload["entropies"], payload["mdl_trajectory"]), pretty=True, fp=fp)
             except Exception as e:
                 print(f"Warning: failed to export Plotly JSON: {e}", file=sys.stderr)
 
-    if args.pretty:
-        print(json.dumps(payload, indent=2))
-    else:
-        print(json.dumps(payload))
+    write_json(payload, pretty=args.pretty)
 
     return 0
 
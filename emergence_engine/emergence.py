@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from dataclasses import dataclass
+from functools import lru_cache
 from math import log2
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 
 from .grammar import Grammar
 
@@ -11,16 +13,15 @@ def compute_entropy(grammar: Grammar) -> float:
     """Shannon entropy (bits) over rule usage frequencies.
 
     If there are no rules or zero total frequency, returns 0.0.
+    The result is memoized on the grammar until its rules change.
     """
-    total = sum(r.frequency for r in grammar.rules.values())
-    if total <= 0:
-        return 0.0
-    H = 0.0
-    for r in grammar.rules.values():
-        if r.frequency <= 0:
-            continue
-        p = r.frequency / total
-        H -= p * log2(p)
+    cached = grammar._cached_entropy
+    if cached is not None:
+        return cached
+    freqs = [r.frequency for r in grammar.rules.values() if r.frequency > 0]
+    total = sum(freqs)
+    H = sum(-p * log2(p) for p in (f / total for f in freqs)) if total > 0 else 0.0
+    grammar._cached_entropy = H
     return H
 
 
@@ -85,7 +86,7 @@ class EmergenceDetector:
     def _curvatures(entropies: List[float]) -> List[float]:
         if len(entropies) < 3:
             return []
-        return [entropies[i + 1] - 2 * entropies[i] + entropies[i - 1] for i in range(1, len(entropies) - 1)]
+        return [c - 2 * b + a for a, b, c in zip(entropies, entropies[1:], entropies[2:])]
 
     def threshold_from_entropies(self, entropies: List[float]) -> float:
         """Compute threshold for 'adaptive' mode using robust stats on curvature.
@@ -98,58 +99,90 @@ class EmergenceDetector:
             return self.threshold
         max_entropy = max(entropies) or 1.0
         values = [abs(c) / max_entropy for c in curv]
-        med = _median(values)
-        mad = _median([abs(v - med) for v in values])
+        return self._robust_threshold(values)
+
+    def _robust_threshold(self, values: List[float]) -> float:
+        vs = sorted(values)
+        med = _median_sorted(vs)
+        # |v - med| descends up to the median and ascends after it, so the
+        # deviations form two sorted runs that sorted() merges in linear time.
+        split = bisect_left(vs, med)
+        deviations = [med - v for v in reversed(vs[:split])]
+        deviations.extend(v - med for v in vs[split:])
+        mad = _median_sorted(sorted(deviations))
         return med + self.k * mad
 
     def detect(self, grammars: List[Grammar]) -> Dict[str, List]:
-        entropies = [compute_entropy(g) for g in grammars]
+        return self.detect_from_entropies([compute_entropy(g) for g in grammars])
+
+    def detect_from_entropies(self, entropies: List[float]) -> Dict[str, List]:
+        """Detect events from a precomputed entropy trajectory."""
         events: List[EmergenceEvent] = []
         if len(entropies) < 3:
             return {"entropies": entropies, "events": events}
 
-        thr = self.threshold if self.mode != "adaptive" else self.threshold_from_entropies(entropies)
+        # Curvature and its normalized magnitude are computed once and shared
+        # by the adaptive threshold and the gating loop below.
+        curv = self._curvatures(entropies)
         max_entropy = max(entropies) or 1.0
+        norms = [abs(c) / max_entropy for c in curv]
+        thr = self.threshold if self.mode != "adaptive" else self._robust_threshold(norms)
+
+        gate = _make_gate(float(thr), self.hysteresis, self.min_persistence, self.min_gap)
+        for i in gate(norms):
+            d2 = curv[i - 1]
+            events.append(
+                EmergenceEvent(
+                    index=i,
+                    magnitude=d2,
+                    kind="emergence" if d2 < 0 else "dissolution",
+                    entropy_before=entropies[i - 1],
+                    entropy_after=entropies[i + 1],
+                    rules_added=[],
+                )
+            )
+
+        return {"entropies": entropies, "events": events}
+
+
+@lru_cache(maxsize=16)
+def _make_gate(thr: float, hysteresis: float, min_persistence: int, min_gap: int) -> Callable[[List[float]], List[int]]:
+    """Build the persistence/hysteresis gate for one set of settings.
 
-        # Persistence/hysteresis gating
+    The returned function maps normalized curvatures to event indices;
+    `norms[j]` is the curvature magnitude at snapshot index j + 1. Settings
+    are bound as locals of the closure, so the loop does no attribute or
+    global lookups, and repeated runs with the same settings (e.g. many
+    sliding-window analyses) reuse the same function.
+    """
+    release = max(0.0, thr - hysteresis)
+
+    def gate(norms: List[float]) -> List[int]:
+        out: List[int] = []
+        append = out.append
         run = 0
         active = False
         last_event_idx = -10**9
-
-        for i in range(1, len(entropies) - 1):
-            d2 = entropies[i + 1] - 2 * entropies[i] + entropies[i - 1]
-            norm = abs(d2) / max_entropy
+        for i, norm in enumerate(norms, start=1):
             if norm >= thr:
                 run += 1
             else:
                 run = 0
-
-            if not active and run >= self.min_persistence and (i - last_event_idx) >= self.min_gap:
-                kind = "emergence" if d2 < 0 else "dissolution"
-                events.append(
-                    EmergenceEvent(
-                        index=i,
-                        magnitude=d2,
-                        kind=kind,
-                        entropy_before=entropies[i - 1],
-                        entropy_after=entropies[i + 1],
-                        rules_added=[],
-                    )
-                )
+            if not active and run >= min_persistence and (i - last_event_idx) >= min_gap:
+                append(i)
                 active = True
                 last_event_idx = i
-
-            if active and norm <= max(0.0, thr - self.hysteresis):
+            if active and norm <= release:
                 active = False
+        return out
 
-        return {"entropies": entropies, "events": events}
+    return gate
 
 
-def _median(values: List[float]) -> float:
-    n = len(values)
+def _median_sorted(vs: List[float]) -> float:
+    n = len(vs)
     if n == 0:
         return 0.0
-    vs = sorted(values)
     mid = n // 2
     if n % 2 == 1:
         return vs[mid]
@@ -1,18 +1,23 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import InitVar, dataclass, field
 from typing import Dict, List, Optional, Tuple
 
+from .grammar import Grammar
 from .mdl import MDLScorer
 from .repair import RePair
 from .tokenizer import simple_tokenize, chars as char_tokens
-from .emergence import EmergenceDetector
+from .emergence import EmergenceDetector, compute_entropy
 
 
 @dataclass
 class EngineResult:
     compressed: List[str]
-    rules: Dict[str, tuple]
+    # None when `grammar` is given; `rules` is then built from it on first access
+    rules: InitVar[Optional[Dict[str, tuple]]]
     mdl_score: float
     compression_ratio: float
     mdl_grammar_cost: float
@@ -26,6 +31,43 @@ class EngineResult:
     windows_entropies: Optional[List[float]] = None
     windows_mdl: Optional[List[float]] = None
     window_events: Optional[List[dict]] = None
+    grammar: Optional[Grammar] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self, rules: Optional[Dict[str, tuple]]) -> None:
+        if rules is not None:
+            self.rules = rules
+
+    def __getattr__(self, name: str):
+        # Only reached while `rules` is unset; afterwards it is a plain attribute
+        if name != "rules":
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        rules = self.grammar.as_tuples() if self.grammar is not None else {}
+        self.rules = rules
+        return rules
+
+
+# Per-process state for parallel sliding windows: the token list and miner
+# are shipped once per worker instead of once per window.
+_WINDOW_TOKENS: List[str] = []
+_WINDOW_MINER: Optional[RePair] = None
+
+
+def _init_window_worker(tokens: List[str], miner: RePair) -> None:
+    global _WINDOW_TOKENS, _WINDOW_MINER
+    _WINDOW_TOKENS = tokens
+    _WINDOW_MINER = miner
+
+
+def _compress_window(bounds: Tuple[int, int]) -> Tuple[List[str], Grammar]:
+    start, end = bounds
+    compressed, grammar = _WINDOW_MINER.compress(_WINDOW_TOKENS, start, end)
+    compute_entropy(grammar)  # memoized on the grammar, travels back with it
+    return compressed, grammar
+
+
+def _rules_added(prev: Grammar, nxt: Grammar) -> List[str]:
+    """LHS names present in `nxt` but not in `prev` (dict key views, no rule copies)."""
+    return sorted(nxt.rules.keys() - prev.rules.keys())
 
 
 class EmergenceEngine:
@@ -34,6 +76,14 @@ class EmergenceEngine:
         self.pattern_miner = RePair()
         self.mdl = MDLScorer()
 
+    def _tokenize(self, input_text: str, chars: bool) -> List[str]:
+        if chars:
+            # Single characters are already shared objects in CPython
+            return char_tokens(input_text)
+        # Interning makes equal tokens the same object, so the pair counting
+        # and matching in RePair hit identity checks instead of comparisons.
+        return list(map(sys.intern, self.tokenizer(input_text)))
+
     def process(
         self,
         input_text: str,
@@ -50,35 +100,67 @@ class EmergenceEngine:
         hysteresis: float = 0.1,
         min_gap: int = 2,
     ) -> EngineResult:
-        tokens = (char_tokens(input_text) if chars else self.tokenizer(input_text))
+        return self.process_tokens(
+            self._tokenize(input_text, chars),
+            emergence=emergence,
+            threshold=threshold,
+            window=window,
+            preset=preset,
+            mode=mode,
+            k=k,
+            percentile=percentile,
+            min_persistence=min_persistence,
+            hysteresis=hysteresis,
+            min_gap=min_gap,
+        )
+
+    def process_tokens(
+        self,
+        tokens: List[str],
+        *,
+        emergence: bool = False,
+        threshold: float = 0.25,
+        window: int = 1,
+        preset: str | None = None,
+        mode: str = "static",
+        k: float = 3.0,
+        percentile: float = 0.9,
+        min_persistence: int = 2,
+        hysteresis: float = 0.1,
+        min_gap: int = 2,
+    ) -> EngineResult:
+        """Like `process`, for input that is already a token list.
+
+        Tokens are used as given; they are not joined and re-split, so a
+        token may contain whitespace.
+        """
         if emergence:
             snapshots = self.pattern_miner.compress_trace(tokens)
             # Use last snapshot as final compressed+grammar
             compressed, grammar = snapshots[-1]
         else:
             compressed, grammar = self.pattern_miner.compress(tokens)
-        sigma = len(set(tokens)) or 2
+        # Distinct-token count is computed once and shared by all MDL terms
+        n_terminals = len(set(tokens))
+        sigma = n_terminals or 2
         mdl_components = self.mdl.score_components(grammar, compressed, sigma)
         mdl_score = mdl_components["total"]
-        ratio = self.mdl.compression_ratio(tokens, compressed, grammar)
+        ratio = self.mdl.compression_ratio(tokens, compressed, grammar, n_terminals)
 
         # Reconstruction and coverage
         reconstructed = self.pattern_miner.reconstruct(compressed, grammar)
         valid_lossless = reconstructed == tokens
         total_tokens = len(reconstructed) if reconstructed else len(tokens)
-        covered = 0
-        for sym in compressed:
-            if sym in grammar.rules:
-                # count expansion size as covered
-                # Expand one level: sum of terminals in full expansion
-                # We can reuse reconstruction of [sym]
-                covered += len(self.pattern_miner.reconstruct([sym], grammar))
+        # Tokens covered by rules: sum of full expansion sizes of rule symbols
+        lengths = self.pattern_miner.expansion_lengths(grammar)
+        covered = sum(lengths[sym] for sym in compressed if sym in lengths)
         coverage = (covered / total_tokens) if total_tokens > 0 else 0.0
 
-        naive = self.mdl.naive_baseline(tokens)
+        naive = self.mdl.naive_baseline(tokens, n_terminals)
         result = EngineResult(
             compressed=compressed,
-            rules={k: tuple(v) for k, v in grammar.as_tuples().items()},
+            rules=None,
+            grammar=grammar,
             mdl_score=mdl_score,
             compression_ratio=ratio,
             mdl_grammar_cost=mdl_components["grammar_cost"],
@@ -100,26 +182,17 @@ class EmergenceEngine:
                 min_gap=min_gap,
             )
             grammars = [g for _, g in snapshots]
-            det = detector.detect(grammars)
-            # Convert events to plain dicts for JSON friendliness
-            result.entropies = det["entropies"]
-            # MDL trajectory
-            sigma = len(set(tokens)) or 2
-            result_mdl = []
-            for seq, gram in snapshots:
-                comps = self.mdl.score_components(gram, seq, sigma)
-                result_mdl.append({"grammar": comps["grammar_cost"], "data": comps["data_cost"], "total": comps["total"]})
+            # Entropies are memoized per snapshot; MDL is scored as one batch
+            entropies = [compute_entropy(g) for g in grammars]
+            g_costs, d_costs, totals = self.mdl.score_components_batch(grammars, [seq for seq, _ in snapshots], sigma)
+            result_mdl = [{"grammar": gc, "data": dc, "total": t} for gc, dc, t in zip(g_costs, d_costs, totals)]
+            det = detector.detect_from_entropies(entropies)
             # Grammar differencing for events: compare grammars[i-1] to grammars[i+1]
-            def rules_added(prev: Dict[str, tuple], nxt: Dict[str, tuple]) -> list[str]:
-                return sorted([lhs for lhs in nxt.keys() if lhs not in prev])
-
             events_dicts = []
             for e in det["events"]:
                 idx = e.index
                 if 1 <= idx < len(grammars) - 1:
-                    prev = grammars[idx - 1].as_tuples()
-                    nxt = grammars[idx + 1].as_tuples()
-                    e.rules_added = rules_added(prev, nxt)
+                    e.rules_added = _rules_added(grammars[idx - 1], grammars[idx + 1])
                 events_dicts.append(
                     {
                         "index": e.index,
@@ -130,6 +203,7 @@ class EmergenceEngine:
                         "rules_added": e.rules_added,
                     }
                 )
+            # Convert events to plain dicts for JSON friendliness
             result.events = events_dicts
             result.entropies = det["entropies"]
             # Attach MDL trajectory
@@ -152,43 +226,64 @@ class EmergenceEngine:
         min_persistence: int = 2,
         hysteresis: float = 0.1,
         min_gap: int = 2,
+        workers: int = 1,
     ) -> EngineResult:
-        tokens = (char_tokens(input_text) if chars else self.tokenizer(input_text))
-        # Build token windows
-        windows: List[List[str]] = []
-        for start in range(0, max(0, len(tokens) - window_size + 1), max(1, step)):
-            windows.append(tokens[start : start + window_size])
+        """Analyze independent token windows and detect events across them.
+
+        Windows are compressed in `workers` processes when workers != 1
+        (0 means one per CPU); results are merged in window order.
+        """
+        tokens = self._tokenize(input_text, chars)
+        # Build token windows as (start, end) bounds; RePair slices each once
+        windows: List[Tuple[int, int]] = [
+            (start, start + window_size)
+            for start in range(0, max(0, len(tokens) - window_size + 1), max(1, step))
+        ]
         if not windows:
-            windows = [tokens]
+            windows = [(0, len(tokens))]
 
         grammars: List = []
-        mdl_totals: List[float] = []
+        sequences: List[List[str]] = []
         entropies: List[float] = []
 
         sigma = len(set(tokens)) or 2
         last_compressed: List[str] = []
         last_grammar = None
         # Process each window independently
-        for w in windows:
-            compressed, grammar = self.pattern_miner.compress(w)
-            comps = self.mdl.score_components(grammar, compressed, sigma)
-            mdl_totals.append(comps["total"])
+        if workers != 1 and len(windows) > 1:
+            max_workers = workers if workers > 0 else (os.cpu_count() or 1)
+            chunksize = max(1, len(windows) // (4 * max_workers))
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_window_worker,
+                initargs=(tokens, self.pattern_miner),
+            ) as ex:
+                results = list(ex.map(_compress_window, windows, chunksize=chunksize))
+        else:
+            results = [self.pattern_miner.compress(tokens, start, end) for start, end in windows]
+        for compressed, grammar in results:
+            entropies.append(compute_entropy(grammar))
             grammars.append(grammar)
-            # Entropy will be computed by detector; we also collect coverage and validity only for last window for summary
+            sequences.append(compressed)
+            # Coverage and validity are only collected for the last window for summary
             last_compressed, last_grammar = compressed, grammar
+        _, _, mdl_totals = self.mdl.score_components_batch(grammars, sequences, sigma)
 
         # For summary fields, use last window recon/coverage
+        last_start, last_end = windows[-1]
+        last_window = tokens[last_start:last_end]
         reconstructed = self.pattern_miner.reconstruct(last_compressed, last_grammar) if last_grammar else []
-        valid_lossless = reconstructed == (windows[-1] if windows else [])
-        total_tokens = len(reconstructed) if reconstructed else len(windows[-1])
+        valid_lossless = reconstructed == last_window
+        total_tokens = len(reconstructed) if reconstructed else len(last_window)
         covered = 0
-        for sym in (last_compressed or []):
-            if last_grammar and sym in last_grammar.rules:
-                covered += len(self.pattern_miner.reconstruct([sym], last_grammar))
+        if last_grammar:
+            lengths = self.pattern_miner.expansion_lengths(last_grammar)
+            covered = sum(lengths[sym] for sym in last_compressed if sym in lengths)
         coverage = (covered / total_tokens) if total_tokens > 0 else 0.0
 
         # Naive vs final window MDL
-        naive = self.mdl.naive_baseline(windows[-1] if windows else [])
+        last_terminals = len(set(last_window))
+        naive = self.mdl.naive_baseline(last_window, last_terminals)
 
         # Detect events across windows using grammars per window
         detector = EmergenceDetector(
@@ -202,7 +297,7 @@ class EmergenceEngine:
             hysteresis=hysteresis,
             min_gap=min_gap,
         )
-        det = detector.detect(grammars)
+        det = detector.detect_from_entropies(entropies)
 
         # Compute rules_added across adjacent windows for event attribution
         events_dicts: List[dict] = []
@@ -210,9 +305,7 @@ class EmergenceEngine:
             idx = e.index
             rules_added: List[str] = []
             if 1 <= idx < len(grammars) - 1:
-                prev = grammars[idx - 1].as_tuples()
-                nxt = grammars[idx + 1].as_tuples()
-                rules_added = sorted([lhs for lhs in nxt.keys() if lhs not in prev])
+                rules_added = _rules_added(grammars[idx - 1], grammars[idx + 1])
             events_dicts.append(
                 {
                     "index": idx,
@@ -227,9 +320,10 @@ class EmergenceEngine:
         # Build a result-like object using final window compressed/grammar for core metrics
         result = EngineResult(
             compressed=last_compressed or [],
-            rules={k: tuple(v) for k, v in (last_grammar.as_tuples() if last_grammar else {}).items()},
+            rules=None,
+            grammar=last_grammar,
             mdl_score=mdl_totals[-1] if mdl_totals else 0.0,
-            compression_ratio=self.mdl.compression_ratio(windows[-1] if windows else [], last_compressed or [], last_grammar) if last_grammar else 1.0,
+            compression_ratio=self.mdl.compression_ratio(last_window, last_compressed or [], last_grammar, last_terminals) if last_grammar else 1.0,
             mdl_grammar_cost=0.0,
             mdl_data_cost=0.0,
             naive_mdl=naive,
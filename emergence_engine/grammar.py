@@ -1,12 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from .symbols import Symbol
+from .symbols import DATACLASS_SLOTS, Symbol
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ProductionRule:
     lhs: Symbol  # non-terminal
     rhs: List[Symbol]
@@ -20,6 +20,16 @@ class Grammar:
     terminals: Dict[str, Symbol] = field(default_factory=dict)
     non_terminals: Dict[str, Symbol] = field(default_factory=dict)
     start_symbol: Symbol = field(default_factory=lambda: Symbol("S", kind="nonterminal"))
+    # Memoized rule-usage entropy (see emergence.compute_entropy). Must be
+    # reset by anything that changes rules or their frequencies.
+    _cached_entropy: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    # Total number of RHS symbols across rules, kept alongside `rules` so MDL
+    # scoring does not walk every rule. Maintained by add_rule, inline_rule
+    # and remove_rule; mutate rules through those methods.
+    rhs_size: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.rhs_size = sum(len(rule.rhs) for rule in self.rules.values())
 
     def add_rule(self, lhs_name: str, rhs_values: List[str]) -> ProductionRule:
         if lhs_name not in self.non_terminals:
@@ -27,9 +37,33 @@ class Grammar:
         lhs = self.non_terminals[lhs_name]
         rhs = [self._get_symbol(v) for v in rhs_values]
         rule = ProductionRule(lhs=lhs, rhs=rhs)
+        old = self.rules.get(lhs_name)
+        if old is not None:
+            self.rhs_size -= len(old.rhs)
         self.rules[lhs_name] = rule
+        self.rhs_size += len(rhs)
+        self._cached_entropy = None
         return rule
 
+    def inline_rule(self, owner_name: str, lhs_name: str) -> None:
+        """Splice the RHS of `lhs_name` over its first use in `owner_name`.
+
+        The owner's RHS is edited in place and reuses the inlined rule's
+        Symbol objects, so no symbols are looked up or created.
+        """
+        owner = self.rules[owner_name].rhs
+        inlined = self.rules[lhs_name].rhs
+        for i, sym in enumerate(owner):
+            if sym.value == lhs_name:
+                owner[i : i + 1] = inlined
+                self.rhs_size += len(inlined) - 1
+                return
+
+    def remove_rule(self, lhs_name: str) -> None:
+        rule = self.rules.pop(lhs_name)
+        self.rhs_size -= len(rule.rhs)
+        self._cached_entropy = None
+
     def _get_symbol(self, value: str) -> Symbol:
         if value in self.non_terminals:
             return self.non_terminals[value]
@@ -54,15 +88,39 @@ class Grammar:
         return {lhs: tuple(sym.value for sym in rule.rhs) for lhs, rule in self.rules.items()}
 
     def clone(self) -> "Grammar":
-        g = Grammar()
-        # Recreate non-terminals/terminals maps based on current symbols
-        for name in self.non_terminals:
-            g.non_terminals[name] = Symbol(name, kind="nonterminal")
-        for name in self.terminals:
-            g.terminals[name] = Symbol(name, kind="terminal")
-        # Copy rules
-        for lhs, rule in self.rules.items():
-            g.add_rule(lhs, [sym.value for sym in rule.rhs])
-            g.rules[lhs].frequency = rule.frequency
-            g.rules[lhs].probability = rule.probability
+        # Symbols are frozen, so the copy shares them; only the mutable
+        # containers (symbol maps, rules and their RHS lists) are copied.
+        g = Grammar(terminals=dict(self.terminals), non_terminals=dict(self.non_terminals))
+        g.rules = {
+            lhs: ProductionRule(rule.lhs, list(rule.rhs), rule.frequency, rule.probability)
+            for lhs, rule in self.rules.items()
+        }
+        g.rhs_size = self.rhs_size
+        g._cached_entropy = self._cached_entropy
         return g
+
+
+def inline_symbols(sequence: List[str], expansions: Dict[str, List[str]]) -> List[str]:
+    """Copy of `sequence` with each symbol in `expansions` replaced by its RHS.
+
+    Gives the same result as splicing the expansions into the sequence one
+    at a time, in the dict's insertion order, but in a single pass. An RHS
+    symbol is therefore only expanded if it was inlined after the symbol
+    whose RHS brought it in.
+    """
+    rank = {sym: i for i, sym in enumerate(expansions)}
+    out: List[str] = []
+    append = out.append
+    for sym in sequence:
+        if sym not in rank:
+            append(sym)
+            continue
+        stack = [(v, rank[sym]) for v in reversed(expansions[sym])]
+        while stack:
+            v, parent = stack.pop()
+            r = rank.get(v, -1)
+            if r > parent:
+                stack.extend((u, r) for u in reversed(expansions[v]))
+            else:
+                append(v)
+    return out
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import io
+import json
+import mmap
+import sys
+from pathlib import Path
+from typing import IO, Any, Optional
+
+try:  # optional C encoder; stdlib json is the fallback
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - depends on environment
+    orjson = None
+
+_STDOUT_BUFFER = 1 << 16
+
+
+def _orjson_dumps(payload: Any, pretty: bool) -> bytes:
+    option = orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(payload, option=option)
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON text or UTF-8 bytes, with orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_path(path: str | Path) -> Any:
+    """Parse a JSON file.
+
+    With orjson the file is memory-mapped and parsed in place, so a large
+    input (e.g. a Node tokenizer dump) is never copied into a bytes object;
+    its pages stay in the OS page cache.
+    """
+    with open(path, "rb") as f:
+        if orjson is not None:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):  # empty file, or not mappable
+                pass
+            else:
+                with mm, memoryview(mm) as view:
+                    return orjson.loads(view)
+        return loads(f.read())
+
+
+def write_json(payload: Any, *, pretty: bool = False, fp: Optional[IO[str]] = None) -> None:
+    """Serialize `payload` as JSON followed by a newline.
+
+    Uses orjson when installed. Otherwise output is streamed with json.dump
+    rather than built as one string first. Without `fp`, it goes to stdout
+    through a 64 KiB buffer.
+    """
+    if orjson is not None:
+        data = _orjson_dumps(payload, pretty)
+        if fp is not None:
+            fp.write(data.decode("utf-8"))
+            return
+        raw = getattr(sys.stdout, "buffer", None)
+        if raw is None:
+            sys.stdout.write(data.decode("utf-8"))
+            return
+        sys.stdout.flush()
+        raw.write(data)
+        raw.flush()
+        return
+
+    indent = 2 if pretty else None
+    if fp is not None:
+        json.dump(payload, fp, indent=indent)
+        fp.write("\n")
+        return
+
+    sys.stdout.flush()
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        # stdout replaced by an in-memory stream
+        json.dump(payload, sys.stdout, indent=indent)
+        sys.stdout.write("\n")
+        return
+    with open(fd, "w", buffering=_STDOUT_BUFFER, encoding=sys.stdout.encoding, closefd=False) as out:
+        json.dump(payload, out, indent=indent)
+        out.write("\n")
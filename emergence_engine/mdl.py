@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from math import log2, floor
+from math import log2
 from typing import Dict, List, Tuple
 
 from .grammar import Grammar
@@ -18,7 +18,8 @@ def elias_gamma_length(n: int) -> int:
     """
     if n <= 0:
         n = 1
-    return 2 * floor(log2(n)) + 1
+    # floor(log2(n)) == n.bit_length() - 1 for n >= 1, without float math
+    return 2 * (n.bit_length() - 1) + 1
 
 
 class MDLScorer:
@@ -38,35 +39,70 @@ class MDLScorer:
     """
 
     def score_components(self, grammar: Grammar, compressed: List[str], terminals_size: int) -> Dict[str, float]:
-        sigma = max(2, terminals_size)
-        V = max(2, sigma + len(grammar.rules))
-        sym_cost = _safe_log2(V)
-
-        # Grammar cost: only pay for symbols appearing in RHS across rules
-        grammar_cost = 0.0
-        for rule in grammar.rules.values():
-            rhs_len = len(rule.rhs)
-            grammar_cost += rhs_len * sym_cost
+        (grammar_cost,), (data_cost,), (total,) = self.score_components_batch([grammar], [compressed], terminals_size)
+        return {"grammar_cost": grammar_cost, "data_cost": data_cost, "total": total}
 
-        # Data cost
-        n = len(compressed)
-        data_cost = float(elias_gamma_length(n)) + n * sym_cost
+    def score_components_batch(
+        self, grammars: List[Grammar], sequences: List[List[str]], terminals_size: int
+    ) -> Tuple[List[float], List[float], List[float]]:
+        """Score many (grammar, compressed) pairs sharing one terminal alphabet.
 
-        total = grammar_cost + data_cost
-        return {"grammar_cost": grammar_cost, "data_cost": data_cost, "total": total}
+        Returns parallel lists (grammar_cost, data_cost, total). Setup that
+        depends only on sigma is done once, and log2(V) is reused across
+        snapshots with the same rule count.
+        """
+        sigma = max(2, terminals_size)
+        sym_costs: Dict[int, float] = {}
+        grammar_costs: List[float] = []
+        data_costs: List[float] = []
+        totals: List[float] = []
+        for grammar, compressed in zip(grammars, sequences):
+            V = max(2, sigma + len(grammar.rules))
+            sym_cost = sym_costs.get(V)
+            if sym_cost is None:
+                sym_cost = sym_costs[V] = _safe_log2(V)
+
+            # Grammar cost: only pay for symbols appearing in RHS across rules
+            grammar_cost = grammar.rhs_size * sym_cost
+
+            # Data cost
+            n = len(compressed)
+            data_cost = float(elias_gamma_length(n)) + n * sym_cost
+
+            grammar_costs.append(grammar_cost)
+            data_costs.append(data_cost)
+            totals.append(grammar_cost + data_cost)
+        return grammar_costs, data_costs, totals
 
     def score(self, grammar: Grammar, compressed: List[str], terminals_size: int | None = None) -> float:
         sigma = terminals_size if terminals_size is not None else max(2, len(grammar.terminals) or 2)
         return self.score_components(grammar, compressed, sigma)["total"]
 
-    def naive_baseline(self, original_tokens: List[str]) -> float:
-        sigma = max(2, len(set(original_tokens)) or 2)
+    @staticmethod
+    def _alphabet_size(original_tokens: List[str], terminals_size: int | None) -> int:
+        if terminals_size is None:
+            terminals_size = len(set(original_tokens))
+        return max(2, terminals_size)
+
+    def naive_baseline(self, original_tokens: List[str], terminals_size: int | None = None) -> float:
+        """Cost of emitting `original_tokens` verbatim.
+
+        `terminals_size` may be passed when the caller already knows the
+        number of distinct tokens, to avoid another pass over the input.
+        """
+        sigma = self._alphabet_size(original_tokens, terminals_size)
         n = len(original_tokens)
         return float(elias_gamma_length(n)) + n * _safe_log2(sigma)
 
-    def compression_ratio(self, original_tokens: List[str], compressed: List[str], grammar: Grammar) -> float:
-        sigma = max(2, len(set(original_tokens)) or 2)
-        original_size = self.naive_baseline(original_tokens)
+    def compression_ratio(
+        self,
+        original_tokens: List[str],
+        compressed: List[str],
+        grammar: Grammar,
+        terminals_size: int | None = None,
+    ) -> float:
+        sigma = self._alphabet_size(original_tokens, terminals_size)
+        original_size = self.naive_baseline(original_tokens, sigma)
         compressed_size = self.score(grammar, compressed, terminals_size=sigma)
         if compressed_size == 0:
             return 1.0
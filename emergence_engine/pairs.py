@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from array import array
+from heapq import heapify, heappop, heappush
+from itertools import compress
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .symbols import SymbolTable
+
+Pair = Tuple[int, int]
+
+
+class PairSequence:
+    """Token sequence with incrementally maintained digram counts.
+
+    Shared by RePair and Sequitur, which both repeatedly replace the most
+    frequent adjacent pair. Tokens and rule names are interned to small
+    ints through a SymbolTable; a rule name that equals an input token
+    shares its id, exactly as the two would compare equal as strings.
+
+    The sequence is a doubly linked list over node indices, and every pair
+    keeps the set of nodes where it starts. Replacing a pair only touches
+    the neighbours of its occurrences, so a run of R substitutions over N
+    tokens costs O((N + R) log N) instead of a full recount per step.
+
+    Selection matches `max(Counter(zip(seq, seq[1:])).items())` on the
+    current sequence: highest (overlapping) count, ties going to the pair
+    that occurs first. Nodes keep their original index and only ever get
+    unlinked, so index order is sequence order and a pair's first
+    occurrence is its smallest node index.
+    """
+
+    def __init__(self, tokens: Iterable[str]) -> None:
+        self.symbols = SymbolTable()
+        # Values and links are 4-byte machine ints rather than a pointer to
+        # a boxed int per slot
+        self._val = array("i", map(self.symbols.intern, tokens))
+        n = len(self._val)
+        self._next = array("i", range(1, n + 1))
+        if n:
+            self._next[-1] = -1
+        self._prev = array("i", range(-1, n - 1))
+        # 1 for nodes still linked in; index order is sequence order, so the
+        # live values can be selected through this mask without a walk
+        self._alive = bytearray(b"\x01") * n
+        self._pos: Dict[Pair, Set[int]] = {}
+        self._first: Dict[Pair, int] = {}
+        val = self._val
+        for i, pair in enumerate(zip(val, val[1:])):
+            occ = self._pos.get(pair)
+            if occ is None:
+                self._pos[pair] = {i}
+                self._first[pair] = i
+            else:
+                occ.add(i)
+        # Max-heap on count, then min-heap on first occurrence. Entries go
+        # stale as counts change and are checked against _pos when popped;
+        # pairs seen fewer than twice can never be selected and are skipped.
+        self._heap: List[Tuple[int, int, Pair]] = [
+            (-len(occ), self._first[pair], pair) for pair, occ in self._pos.items() if len(occ) >= 2
+        ]
+        heapify(self._heap)
+
+    def most_frequent(self) -> Optional[Tuple[Pair, int]]:
+        """Most frequent pair and its count, or None if no pair repeats."""
+        heap = self._heap
+        while heap:
+            neg_count, first, pair = heap[0]
+            occ = self._pos.get(pair)
+            if occ is not None and len(occ) == -neg_count and self._first[pair] == first:
+                return pair, -neg_count
+            heappop(heap)
+        return None
+
+    def replace(self, a: int, b: int, new: int) -> int:
+        """Replace non-overlapping (a, b) left to right; returns the count."""
+        val, nxt, prv, alive = self._val, self._next, self._prev, self._alive
+        target = (a, b)
+        occ = self._pos.pop(target, None)
+        if not occ:
+            return 0
+        del self._first[target]
+        touched: Set[Pair] = set()
+        # Ascending order gives the greedy left-to-right matching of a run
+        # like "a a a"; a node consumed as the right half of an earlier
+        # match is dropped from `occ` and skipped.
+        replaced = 0
+        for i in sorted(occ):
+            if i not in occ:
+                continue
+            j = nxt[i]
+            p = prv[i]
+            q = nxt[j]
+            if p != -1:
+                self._drop((val[p], a), p, touched)
+            if q != -1:
+                right = (b, val[q])
+                if right == target:
+                    occ.discard(j)
+                else:
+                    self._drop(right, j, touched)
+            val[i] = new
+            nxt[i] = q
+            alive[j] = 0
+            if q != -1:
+                prv[q] = i
+                self._add((new, val[q]), i, touched)
+            if p != -1:
+                self._add((val[p], new), p, touched)
+            replaced += 1
+        first, pos = self._first, self._pos
+        for pair in touched:
+            pair_occ = pos.get(pair)
+            if pair_occ is None:
+                continue
+            if first[pair] < 0:
+                first[pair] = min(pair_occ)
+            if len(pair_occ) >= 2:
+                heappush(self._heap, (-len(pair_occ), first[pair], pair))
+        return replaced
+
+    def _drop(self, pair: Pair, i: int, touched: Set[Pair]) -> None:
+        occ = self._pos[pair]
+        occ.discard(i)
+        if not occ:
+            del self._pos[pair]
+            del self._first[pair]
+        elif self._first[pair] == i:
+            # Recomputed once per step in replace(), not once per removal
+            self._first[pair] = -1
+        touched.add(pair)
+
+    def _add(self, pair: Pair, i: int, touched: Set[Pair]) -> None:
+        occ = self._pos.get(pair)
+        if occ is None:
+            self._pos[pair] = {i}
+            self._first[pair] = i
+        else:
+            occ.add(i)
+            first = self._first[pair]
+            if 0 <= i < first:
+                self._first[pair] = i
+        touched.add(pair)
+
+    def tokens(self) -> List[str]:
+        return list(map(self.symbols.names.__getitem__, compress(self._val, self._alive)))
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
 from collections import Counter
-from typing import Dict, Iterable, List, Tuple
+from math import log2
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from .grammar import Grammar
+from .grammar import Grammar, inline_symbols
+from .pairs import PairSequence
+from .emergence import compute_entropy
+
+
+# Marks a singleton rule whose one use is in the top-level sequence
+_IN_SEQUENCE = object()
+
+
+def _check_acyclic(pending: List[str], active: Set[str]) -> None:
+    for v in pending:
+        if v in active:
+            raise ValueError(f"cyclic grammar: rule {v!r} expands to itself")
 
 
 class RePair:
@@ -23,23 +36,25 @@ class RePair:
     def __init__(self, prefix: str = "R") -> None:
         self.prefix = prefix
 
-    def compress(self, tokens: List[str]) -> Tuple[List[str], Grammar]:
-        sequence = list(tokens)
+    def compress(self, tokens: List[str], start: int = 0, end: Optional[int] = None) -> Tuple[List[str], Grammar]:
+        """Compress `tokens[start:end]` (the whole list by default)."""
+        # Slicing a list already copies, so a window costs a single copy
+        sequence = tokens[start:end] if isinstance(tokens, list) else list(tokens)[start:end]
         grammar = Grammar()
         rule_id = 1
 
+        seq = PairSequence(sequence)
         while True:
-            counts = self._digram_counts(sequence)
-            if not counts:
-                break
-            digram, freq = max(counts.items(), key=lambda kv: kv[1])
-            if freq < 2:
+            best = seq.most_frequent()
+            if best is None or best[1] < 2:
                 break
+            (a, b), _ = best
 
-            lhs = f"{self.prefix}{rule_id}"
-            grammar.add_rule(lhs, [digram[0], digram[1]])
+            lhs, rule_id = self._rule_name(seq, rule_id)
+            grammar.add_rule(lhs, [seq.symbols.name(a), seq.symbols.name(b)])
             rule_id += 1
-            sequence = self._replace_all(sequence, digram, lhs)
+            seq.replace(a, b, seq.symbols.intern(lhs))
+        sequence = seq.tokens()
 
         # Rule utility: inline rules used <= 1 time
         self._inline_singletons(sequence, grammar)
@@ -56,110 +71,198 @@ class RePair:
         counts are updated for each snapshot to allow entropy/MDL measurement.
         The final step applies inlining and usage update and is also included.
         """
-        sequence = list(tokens)
         grammar = Grammar()
         rule_id = 1
         snapshots: List[Tuple[List[str], Grammar]] = []
 
+        seq = PairSequence(tokens)
         while True:
-            counts = self._digram_counts(sequence)
-            if not counts:
-                break
-            digram, freq = max(counts.items(), key=lambda kv: kv[1])
-            if freq < 2:
+            best = seq.most_frequent()
+            if best is None or best[1] < 2:
                 break
+            (a, b), _ = best
 
-            lhs = f"{self.prefix}{rule_id}"
-            grammar.add_rule(lhs, [digram[0], digram[1]])
+            digram = (seq.symbols.name(a), seq.symbols.name(b))
+            lhs, rule_id = self._rule_name(seq, rule_id)
+            grammar.add_rule(lhs, list(digram))
             rule_id += 1
-            sequence = self._replace_all(sequence, digram, lhs)
+            replaced = seq.replace(a, b, seq.symbols.intern(lhs))
 
-            # Update usage for snapshot
-            self._update_rule_usage(sequence, grammar)
-            snapshots.append((list(sequence), grammar.clone()))
+            # A step only changes usage of the new rule (one use per
+            # replacement) and of rule symbols in the replaced pair (each
+            # replacement removes a use, the new RHS adds one back), so
+            # frequencies are shifted rather than recounted.
+            grammar.rules[lhs].frequency += replaced
+            for sym in digram:
+                if sym in grammar.rules:
+                    grammar.rules[sym].frequency += 1 - replaced
+            # Entropy is summed in the same pass that sets probabilities,
+            # in the order compute_entropy uses.
+            total = sum(r.frequency for r in grammar.rules.values()) or 1
+            terms = []
+            for r in grammar.rules.values():
+                r.probability = p = r.frequency / total
+                if p > 0:
+                    terms.append(-p * log2(p))
+            grammar._cached_entropy = sum(terms, 0.0)
+            snapshots.append((seq.tokens(), grammar.clone()))
 
+        sequence = seq.tokens()
         # Finalize with inlining and update usage, include final snapshot
         self._inline_singletons(sequence, grammar)
         self._update_rule_usage(sequence, grammar)
+        compute_entropy(grammar)
         snapshots.append((list(sequence), grammar.clone()))
         return snapshots
 
+    def _rule_name(self, seq: PairSequence, rule_id: int) -> Tuple[str, int]:
+        """Next rule name from `rule_id` on, skipping names used by input tokens.
+
+        A rule named like an input token would make the two indistinguishable
+        (and could make the rule refer to itself).
+        """
+        lhs = f"{self.prefix}{rule_id}"
+        while lhs in seq.symbols:
+            rule_id += 1
+            lhs = f"{self.prefix}{rule_id}"
+        return lhs, rule_id
+
     def reconstruct(self, compressed: List[str], grammar: Grammar) -> List[str]:
-        """Expand compressed tokens using grammar rules until terminals only."""
-        def expand_symbol(sym: str) -> List[str]:
-            if sym in grammar.rules:
-                rhs = [s for s in grammar.as_tuples()[sym]]
-                out: List[str] = []
-                for t in rhs:
-                    out.extend(expand_symbol(t))
-                return out
-            return [sym]
+        """Expand compressed tokens using grammar rules until terminals only.
 
+        Each rule used is expanded once, children first, and its terminal
+        string is reused for every later occurrence. Raises ValueError if a
+        rule expands (directly or not) to itself.
+        """
+        tuples = grammar.as_tuples()
+        expansions: Dict[str, List[str]] = {}
         out: List[str] = []
-        for t in compressed:
-            out.extend(expand_symbol(t))
+        for sym in compressed:
+            if sym not in tuples:
+                out.append(sym)
+                continue
+            stack = [sym]
+            # Rules whose children are being expanded: the path to the top
+            active: Set[str] = set()
+            while stack:
+                lhs = stack[-1]
+                if lhs in expansions:
+                    stack.pop()
+                    continue
+                rhs = tuples[lhs]
+                pending = [v for v in rhs if v in tuples and v not in expansions]
+                if pending:
+                    active.add(lhs)
+                    _check_acyclic(pending, active)
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                active.discard(lhs)
+                expanded: List[str] = []
+                for v in rhs:
+                    if v in tuples:
+                        expanded.extend(expansions[v])
+                    else:
+                        expanded.append(v)
+                expansions[lhs] = expanded
+            out.extend(expansions[sym])
         return out
 
     @staticmethod
-    def _digram_counts(sequence: List[str]) -> Dict[Tuple[str, str], int]:
-        return Counter(zip(sequence, sequence[1:]))
+    def expansion_lengths(grammar: Grammar) -> Dict[str, int]:
+        """Number of terminals each rule expands to.
 
-    @staticmethod
-    def _replace_all(sequence: List[str], digram: Tuple[str, str], lhs: str) -> List[str]:
-        out: List[str] = []
-        i = 0
-        n = len(sequence)
-        while i < n:
-            if i < n - 1 and sequence[i] == digram[0] and sequence[i + 1] == digram[1]:
-                out.append(lhs)
-                i += 2
-            else:
-                out.append(sequence[i])
-                i += 1
-        return out
+        Memoized over the rule DAG, so every rule is sized once in
+        O(|rules| + total RHS length) instead of re-expanding per use.
+        Raises ValueError if a rule expands (directly or not) to itself.
+        """
+        rules = grammar.rules
+        lengths: Dict[str, int] = {}
+        for root in rules:
+            if root in lengths:
+                continue
+            stack = [root]
+            active: Set[str] = set()
+            while stack:
+                lhs = stack[-1]
+                if lhs in lengths:
+                    stack.pop()
+                    continue
+                rhs = [sym.value for sym in rules[lhs].rhs]
+                pending = [v for v in rhs if v in rules and v not in lengths]
+                if pending:
+                    active.add(lhs)
+                    _check_acyclic(pending, active)
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                active.discard(lhs)
+                lengths[lhs] = sum(lengths[v] if v in rules else 1 for v in rhs)
+        return lengths
 
     def _inline_singletons(self, sequence: List[str], grammar: Grammar) -> None:
         # Repeat until no change: inline rules that appear <= 1 time across sequence and rules
+        rules = grammar.rules
         changed = True
-        while changed and grammar.rules:
+        while changed and rules:
             changed = False
-            usage = self._collect_symbol_usage(sequence, grammar)
-            for lhs in list(grammar.rules.keys()):
-                if usage.get(lhs, 0) <= 1:
-                    rhs = list(grammar.as_tuples()[lhs])
-                    # Inline once in sequence if present
-                    if lhs in sequence:
-                        idx = sequence.index(lhs)
-                        sequence[idx:idx + 1] = rhs
-                        changed = True
-                    # Inline inside other rules
-                    for r in grammar.rules.values():
-                        if r.lhs.value == lhs:
-                            continue
-                        new_rhs: List[str] = []
-                        for sym in [s.value for s in r.rhs]:
-                            if sym == lhs:
-                                new_rhs.extend(rhs)
-                                changed = True
-                            else:
-                                new_rhs.append(sym)
-                        r.rhs = [grammar._get_symbol(v) for v in new_rhs]
-                    # Remove the rule
-                    if lhs in grammar.rules:
-                        del grammar.rules[lhs]
-
-    def _collect_symbol_usage(self, sequence: List[str], grammar: Grammar) -> Dict[str, int]:
-        usage: Dict[str, int] = Counter(sequence)
-        for lhs, rule in grammar.rules.items():
+            usage = self._lhs_usage(sequence, grammar)
+            singles = {lhs for lhs, n in usage.items() if n <= 1}
+            # Inlining only moves symbols or drops unused ones, so a rule with
+            # at most one use at the start of the pass has at most one use
+            # throughout it. Track that use (owning rule or the sequence)
+            # instead of rescanning the sequence and every rule per inline.
+            where: Dict[str, object] = dict.fromkeys(singles.intersection(sequence), _IN_SEQUENCE)
+            for owner, rule in rules.items():
+                for sym in rule.rhs:
+                    if sym.value in singles:
+                        where[sym.value] = owner
+            # Sequence inlines are spliced in one rebuild at the end of the pass
+            expansions: Dict[str, List[str]] = {}
+            for lhs in list(rules):
+                if lhs not in singles:
+                    continue
+                rhs = [s.value for s in rules[lhs].rhs]
+                loc = where.get(lhs)
+                if loc is _IN_SEQUENCE:
+                    expansions[lhs] = rhs
+                    changed = True
+                elif loc is not None:
+                    grammar.inline_rule(loc, lhs)
+                    changed = True
+                # Singletons used by this rule now live wherever it went
+                for v in rhs:
+                    if v in singles and where.get(v) == lhs:
+                        if loc is None:
+                            del where[v]
+                        else:
+                            where[v] = loc
+                grammar.remove_rule(lhs)
+            if expansions:
+                sequence[:] = inline_symbols(sequence, expansions)
+
+    @staticmethod
+    def _lhs_usage(sequence: List[str], grammar: Grammar) -> Dict[str, int]:
+        """Uses of each rule LHS in the sequence and in rule RHSs.
+
+        Only rule symbols are tallied: the sequence is counted in C and
+        projected onto the rules, and terminals in RHSs cost a lookup only.
+        """
+        rules = grammar.rules
+        in_sequence = Counter(sequence)
+        usage = {lhs: in_sequence.get(lhs, 0) for lhs in rules}
+        for rule in rules.values():
             for sym in rule.rhs:
-                usage[sym.value] = usage.get(sym.value, 0) + 1
+                v = sym.value
+                if v in usage:
+                    usage[v] += 1
         return usage
 
     def _update_rule_usage(self, sequence: List[str], grammar: Grammar) -> None:
-        usage = self._collect_symbol_usage(sequence, grammar)
-        # Count only uses of each LHS (not internal symbol frequency)
+        usage = self._lhs_usage(sequence, grammar)
         for lhs, rule in grammar.rules.items():
-            rule.frequency = usage.get(lhs, 0)
+            rule.frequency = usage[lhs]
+        grammar._cached_entropy = None
         # Optionally compute probabilities as normalized frequencies across rules
         total = sum(r.frequency for r in grammar.rules.values()) or 1
         for r in grammar.rules.values():
@@ -1,7 +1,12 @@
+import sys
 from dataclasses import dataclass
+from typing import Dict, List
 
+# dataclass(slots=True) needs Python 3.10+; older interpreters keep a __dict__.
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class Symbol:
     """Simple symbol wrapper (type, value).
 
@@ -14,3 +19,28 @@ class Symbol:
     def __str__(self) -> str:  # pragma: no cover - trivial
         return self.value
 
+
+class SymbolTable:
+    """Interns symbol values to dense int ids (0, 1, 2, ...) and back."""
+
+    __slots__ = ("_ids", "names")
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.names)
+            self.names.append(value)
+        return idx
+
+    def name(self, idx: int) -> str:
+        return self.names[idx]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._ids
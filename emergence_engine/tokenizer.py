@@ -7,10 +7,12 @@ def simple_tokenize(text: str) -> List[str]:
     - Splits on any whitespace
     - Keeps punctuation as part of tokens
     """
-    return [t for t in text.strip().split() if t]
+    # str.split() with no separator already drops leading/trailing
+    # whitespace and never yields empty tokens
+    return text.split()
 
 
 def chars(text: str) -> List[str]:
     """Character-level tokenization (including spaces compressed to \x20)."""
-    return [c if c != " " else "\x20" for c in text]
+    return list(text)
 
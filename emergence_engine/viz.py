@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from io import StringIO
+from operator import itemgetter
+from typing import IO, Dict, List
 
 from .grammar import Grammar
 
@@ -11,26 +13,42 @@ def grammar_to_dot(grammar: Grammar) -> str:
     Each rule LHS -> RHS is represented as a node for LHS and edges to each RHS symbol.
     Terminals are boxed; non-terminals are ellipses.
     """
-    lines: List[str] = ["digraph Grammar {", "  rankdir=LR;"]
-    # Declare nodes
-    nts = set(grammar.non_terminals.keys())
-    ts = set(grammar.terminals.keys())
+    buf = StringIO()
+    write_dot(grammar, buf)
+    return buf.getvalue()
+
+
+def write_dot(grammar: Grammar, fp: IO[str]) -> None:
+    """Write the `grammar_to_dot` rendering to `fp` line by line.
+
+    Nothing is accumulated, so exporting a large grammar to a file never
+    holds the whole DOT text (or a list of its lines) in memory.
+    """
+    w = fp.write
+    w("digraph Grammar {\n  rankdir=LR;")
+    # Declare nodes referenced by the current rules. The grammar's symbol
+    # tables also keep entries for rules that were inlined away.
+    nts = set(grammar.rules)
+    ts = set()
+    for rule in grammar.rules.values():
+        for sym in rule.rhs:
+            (nts if sym.kind == "nonterminal" else ts).add(sym.value)
+    # Lines carry their leading newline so the output has no trailing one
     for t in ts:
-        lines.append(f'  "{t}" [shape=box, style=filled, fillcolor=lightgray];')
+        w(f'\n  "{t}" [shape=box, style=filled, fillcolor=lightgray];')
     for nt in nts:
-        lines.append(f'  "{nt}" [shape=ellipse];')
+        w(f'\n  "{nt}" [shape=ellipse];')
     # Edges per rule
     for lhs, rule in grammar.rules.items():
         for sym in rule.rhs:
-            lines.append(f'  "{lhs}" -> "{sym.value}";')
-    lines.append("}")
-    return "\n".join(lines)
+            w(f'\n  "{lhs}" -> "{sym.value}";')
+    w("\n}")
 
 
 def trajectory_to_plotly_json(entropies: List[float], mdl_traj: List[Dict[str, float]]) -> Dict:
     """Return a minimal Plotly-friendly JSON payload with entropy and MDL curves."""
     x = list(range(len(entropies)))
-    total = [step["total"] for step in mdl_traj]
+    total = list(map(itemgetter("total"), mdl_traj))
     data = [
         {"type": "scatter", "name": "Entropy", "x": x, "y": entropies, "yaxis": "y1"},
         {"type": "scatter", "name": "MDL Total", "x": x, "y": total, "yaxis": "y2"},
@@ -1,7 +1,8 @@
 #!/usr/bin/env node
 /*
  AST-based tokenizer for React/TS projects.
- Emits a JSON payload with flat token array and basic counts.
+ Emits a JSON payload with flat token array and basic counts, or with
+ --jsonl, one token array per file followed by a summary line.
 */
 const fs = require('fs');
 const path = require('path');
@@ -67,24 +68,44 @@ function tokenizeFile(file) {
   return tokens;
 }
 
+function countKinds(tokens, counts) {
+  for (const t of tokens) {
+    if (t.startsWith('TAG:')) counts.tags++;
+    else if (t.startsWith('PROP:')) counts.props++;
+    else if (t.startsWith('IMPORT:')) counts.components++;
+  }
+}
+
 function main() {
-  const root = process.argv[2] ? path.resolve(process.argv[2]) : process.cwd();
+  const args = process.argv.slice(2);
+  // --jsonl: one JSON array of tokens per file as it is parsed, then a
+  // final {files, counts} object line, so a reader can consume tokens
+  // while later files are still being tokenized.
+  const jsonl = args.includes('--jsonl');
+  const rootArg = args.find(a => !a.startsWith('--'));
+  const root = rootArg ? path.resolve(rootArg) : process.cwd();
   const files = listFiles(root);
+  const counts = { tags: 0, props: 0, components: 0 };
+  if (jsonl) {
+    for (const f of files) {
+      const toks = tokenizeFile(f);
+      countKinds(toks, counts);
+      if (toks.length) process.stdout.write(JSON.stringify(toks) + '\n');
+    }
+    process.stdout.write(JSON.stringify({ files: files.length, counts }) + '\n');
+    return;
+  }
   const all = [];
   for (const f of files) {
     all.push(...tokenizeFile(f));
   }
+  countKinds(all, counts);
   const payload = {
     files: files.length,
     tokens: all,
-    counts: {
-      tags: all.filter(t => t.startsWith('TAG:')).length,
-      props: all.filter(t => t.startsWith('PROP:')).length,
-      components: all.filter(t => t.startsWith('IMPORT:')).length,
-    },
+    counts,
   };
   process.stdout.write(JSON.stringify(payload));
 }
 
 if (require.main === module) main();
-
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import argparse
-import json
+from collections import Counter
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
 from emergence_engine.engine import EmergenceEngine
+from emergence_engine.jsonio import load_path, write_json
 
 from .react_tokenizer import tokenize_project
 from .tokenizer_node_bridge import has_node_tokenizer, tokenize_project_ast
@@ -17,7 +18,7 @@ from .generator import generate_from_suggestions
 # Self-contained report handler to avoid NameError during parser construction
 def _report_cmd(args: argparse.Namespace) -> int:
     from .report import render_markdown_report, render_llm_summary
-    data = json.loads(Path(args.analysis).read_text(encoding='utf-8'))
+    data = load_path(args.analysis)
     md = render_markdown_report(data)
     if getattr(args, 'llm', None):
         summary = render_llm_summary(data, args.llm)
@@ -30,12 +31,46 @@ def _report_cmd(args: argparse.Namespace) -> int:
     return 0
 
 
+def _top_by_kind(tokens: List[str], kinds: Tuple[str, ...], n: int = 10) -> Dict[str, List[Tuple[str, int]]]:
+    """Most frequent names per token kind ("KIND:name"), up to `n` each.
+
+    One count and one ranking serve every kind; ties keep first-seen order.
+    A compound "TAG:<name>|<prop>,..." token (--compound-props) counts as
+    its tag and each of its props.
+    """
+    counts = Counter(tokens)
+    if any("|" in token for token in counts):
+        folded: Counter = Counter()
+        for token, count in counts.items():
+            if token.startswith("TAG:") and "|" in token:
+                tag, _, props = token.partition("|")
+                folded[tag] += count
+                for prop in props.split(","):
+                    folded["PROP:" + prop] += count
+            else:
+                folded[token] += count
+        counts = folded
+    top: Dict[str, List[Tuple[str, int]]] = {kind: [] for kind in kinds}
+    open_kinds = len(kinds)
+    for token, count in counts.most_common():
+        kind, sep, name = token.partition(":")
+        bucket = top.get(kind)
+        if not sep or bucket is None or len(bucket) >= n:
+            continue
+        bucket.append((name, count))
+        if len(bucket) == n:
+            open_kinds -= 1
+            if not open_kinds:
+                break
+    return top
+
+
 def cmd_analyze(args: argparse.Namespace) -> int:
     # Input source precedence: --tokens JSON > AST tokenizer > regex tokenizer
     tokens: list[str]
     counts: dict[str, int]
     if getattr(args, 'tokens', None):
-        data = json.loads(Path(args.tokens).read_text(encoding='utf-8'))
+        data = load_path(args.tokens)
         tokens = list(data.get('tokens', []))
         counts = {
             'files': int(data.get('files', 0)),
@@ -48,14 +83,12 @@ def cmd_analyze(args: argparse.Namespace) -> int:
         use_ast = bool(args.ast) and has_node_tokenizer()
         if args.ast and not has_node_tokenizer():
             print("Warning: --ast requested but Node tokenizer not available; falling back to regex tokenizer.")
-        tokens, counts = tokenize_project_ast(args.path) if use_ast else tokenize_project(args.path)
-
-    # Bridge tokens to engine by joining with spaces (engine uses whitespace tokenizer)
-    text = " ".join(tokens)
+        tokens, counts = tokenize_project_ast(args.path) if use_ast else tokenize_project(args.path, args.workers, args.compound_props, args.close_tags)
 
+    # Tokens go straight to the engine; no join/re-split round trip
     engine = EmergenceEngine()
-    result = engine.process(
-        text,
+    result = engine.process_tokens(
+        tokens,
         emergence=args.emergence,
         threshold=args.threshold,
         window=args.window,
@@ -63,23 +96,15 @@ def cmd_analyze(args: argparse.Namespace) -> int:
         mode=args.emergence_mode,
         k=args.k,
         percentile=args.percentile,
-        chars=False,
         min_persistence=args.min_persistence,
         hysteresis=args.hysteresis,
         min_gap=args.min_gap,
     )
 
     # Basic suggestions: list top tokens by frequency (tags/props)
-    # Keep simple and useful for now
-    freq: dict[str, int] = {}
-    for t in tokens:
-        freq[t] = freq.get(t, 0) + 1
+    top = _top_by_kind(tokens, ("TAG", "PROP", "IMPORT"))
 
-    def top(prefix: str, n: int = 10) -> list[tuple[str, int]]:
-        items = [(k.split(":", 1)[1], v) for k, v in freq.items() if k.startswith(prefix)]
-        return sorted(items, key=lambda kv: kv[1], reverse=True)[:n]
-
-    fams = discover_families(args.path)
+    fams = discover_families(args.path, args.workers)
     suggestions = family_suggestions(fams)
 
     payload = {
@@ -102,9 +127,9 @@ def cmd_analyze(args: argparse.Namespace) -> int:
         },
         "patterns": {
             "rules": result.rules,
-            "top_tags": top("TAG:"),
-            "top_props": top("PROP:"),
-            "top_components": top("IMPORT:"),
+            "top_tags": top["TAG"],
+            "top_props": top["PROP"],
+            "top_components": top["IMPORT"],
         },
         "families": {
             "count": len(fams),
@@ -122,28 +147,18 @@ def cmd_analyze(args: argparse.Namespace) -> int:
     # Exports
     try:
         if args.export_graphviz:
-            from emergence_engine.viz import grammar_to_dot
-            # Rebuild Grammar from rules
-            from emergence_engine.grammar import Grammar
-            g = Grammar()
-            for lhs, rhs in result.rules.items():
-                g.add_rule(lhs, list(rhs))
-            args.export_graphviz.write_text(grammar_to_dot(g), encoding="utf-8")
+            from emergence_engine.viz import write_dot
+            with args.export_graphviz.open("w", encoding="utf-8") as fp:
+                write_dot(result.grammar, fp)
         if args.export_trajectory and args.emergence:
             from emergence_engine.viz import trajectory_to_plotly_json
             if result.entropies and getattr(result, "mdl_trajectory", None):
-                import json as _json
-                args.export_trajectory.write_text(
-                    _json.dumps(trajectory_to_plotly_json(result.entropies, result.mdl_trajectory), indent=2),
-                    encoding="utf-8",
-                )
+                with args.export_trajectory.open("w", encoding="utf-8") as fp:
+                    write_json(trajectory_to_plotly_json(result.entropies, result.mdl_trajectory), pretty=True, fp=fp)
     except Exception as e:  # non-fatal
         print(f"Warning: export failed: {e}")
 
-    if args.pretty:
-        print(json.dumps(payload, indent=2))
-    else:
-        print(json.dumps(payload))
+    write_json(payload, pretty=args.pretty)
     return 0
 
 
@@ -166,6 +181,9 @@ def build_parser() -> argparse.ArgumentParser:
     a.add_argument("--hysteresis", type=float, default=0.1, help="Emergence: hysteresis margin to end events")
     a.add_argument("--min-gap", type=int, default=2, help="Emergence: minimum gap between events")
     a.add_argument("--tokens", type=Path, help="Path to pre-tokenized JSON (from Node tokenizer)")
+    a.add_argument("--workers", type=int, default=1, help="Processes for scanning source files (0 = one per CPU)")
+    a.add_argument("--compound-props", action="store_true", help="Regex tokenizer: one TAG:<name>|<props> token per tag instead of separate PROP tokens")
+    a.add_argument("--close-tags", action="store_true", help="Regex tokenizer: also emit TAG_CLOSE:<name> tokens")
     a.set_defaults(func=cmd_analyze)
 
     # Optional exports for visualization
@@ -180,6 +198,9 @@ def build_parser() -> argparse.ArgumentParser:
     g.add_argument("--tokens", type=Path, help="Path to pre-tokenized JSON (from Node tokenizer)")
     g.add_argument("--llm", choices=["openai", "anthropic"], help="Refine generated components with an LLM (optional)")
     g.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
+    g.add_argument("--workers", type=int, default=1, help="Processes for scanning source files (0 = one per CPU)")
+    g.add_argument("--compound-props", action="store_true", help="Regex tokenizer: one TAG:<name>|<props> token per tag instead of separate PROP tokens")
+    g.add_argument("--close-tags", action="store_true", help="Regex tokenizer: also emit TAG_CLOSE:<name> tokens")
     g.set_defaults(func=cmd_generate)
 
     r = sub.add_parser("report", help="Write a Markdown report from analysis JSON")
@@ -197,24 +218,23 @@ def cmd_generate(args: argparse.Namespace) -> int:
     if args.engine:
         # Obtain tokens for engine analysis if needed
         if args.tokens:
-            data = json.loads(Path(args.tokens).read_text(encoding='utf-8'))
+            data = load_path(args.tokens)
             tokens = list(data.get('tokens', []))
         else:
             use_ast = bool(args.ast) and has_node_tokenizer()
             if args.ast and not has_node_tokenizer():
                 print("Warning: --ast requested but Node tokenizer not available; falling back to regex tokenizer.")
-            tokens, _ = tokenize_project_ast(args.path) if use_ast else tokenize_project(args.path)
+            tokens, _ = tokenize_project_ast(args.path) if use_ast else tokenize_project(args.path, args.workers, args.compound_props, args.close_tags)
         # Run engine to get rules
         engine = EmergenceEngine()
-        text = " ".join(tokens)
-        result = engine.process(text, emergence=False, chars=False)
+        result = engine.process_tokens(tokens, emergence=False)
         suggestions = suggestions_from_rules(result.rules)
         # Fallback to heuristic if engine found nothing
         if not suggestions:
-            fams = discover_families(args.path)
+            fams = discover_families(args.path, args.workers)
             suggestions = family_suggestions(fams)
     else:
-        fams = discover_families(args.path)
+        fams = discover_families(args.path, args.workers)
         suggestions = family_suggestions(fams)
 
     files = generate_from_suggestions(suggestions, args.out, llm_provider=args.llm)
@@ -222,12 +242,7 @@ def cmd_generate(args: argparse.Namespace) -> int:
         "generated": files,
         "suggestions": suggestions,
     }
-    if args.pretty:
-        import json
-        print(json.dumps(payload, indent=2))
-    else:
-        import json
-        print(json.dumps(payload))
+    write_json(payload, pretty=args.pretty)
     return 0
 
 
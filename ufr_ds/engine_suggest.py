@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, List, Set, Tuple
+from collections import Counter, defaultdict
+from typing import DefaultDict, Dict, List, Set, Tuple
+
+from emergence_engine.symbols import SymbolTable
 
 from .families import base_name
 
@@ -9,26 +12,153 @@ Token = str
 RuleMap = Dict[str, Tuple[Token, ...]]
 
 
-def _expand_rule(rule: str, rules: RuleMap, seen: Set[str] | None = None) -> List[Token]:
-    if seen is None:
-        seen = set()
-    if rule in seen:
-        return []
-    seen.add(rule)
-    out: List[Token] = []
-    rhs = rules.get(rule)
-    if not rhs:
-        return []
-    for sym in rhs:
-        if sym in rules:
-            out.extend(_expand_rule(sym, rules, seen))
-        else:
-            out.append(sym)
-    return out
+# Terminal kinds that suggestions use; anything else is dropped on sight.
+# _TAG_PROPS is a compound "TAG:<name>|<prop>,..." token (see
+# react_tokenizer.tokenize_file), counted as the tag plus each of its props.
+_TAG, _PROP, _OTHER, _TAG_PROPS = 0, 1, 2, 3
+
+
+def _terminal_kind(token: Token) -> int:
+    if token.startswith("TAG:"):
+        return _TAG_PROPS if "|" in token else _TAG
+    if token.startswith("PROP:"):
+        return _PROP
+    return _OTHER
+
+
+def _rule_terminals(rules: RuleMap) -> Dict[str, Tuple[List[Token], List[Token]]]:
+    """(tags, prop names) reached by every rule, each in expansion order.
+
+    A rule expands depth-first, and a sub-rule that was already expanded
+    within the same rule contributes nothing the second time. Expansions
+    are memoized: while every rule visited so far is still on the walk's
+    path, none of them can be reachable from a sub-rule, so its memoized
+    expansion is copied in whole instead of being walked again. This
+    covers chains of nested rules, the case where re-walking is costly.
+
+    Rules are numbered 0..R-1 and walked with explicit stacks, so deep
+    grammars do not hit the recursion limit, and visited checks index a
+    bytearray rather than hashing strings. Each distinct terminal is
+    classified once into a one-byte kind; props are stored by name, and a
+    compound tag token contributes its tag and its props.
+    """
+    names = list(rules)
+    index = {lhs: i for i, lhs in enumerate(names)}
+    terminals = SymbolTable()
+    kinds = bytearray()
+    values: List[object] = []  # per terminal id: tag token, prop name or (tag token, prop names)
+
+    def terminal_id(token: Token) -> int:
+        tid = terminals.intern(token)
+        if tid == len(kinds):
+            kind = _terminal_kind(token)
+            kinds.append(kind)
+            if kind == _PROP:
+                values.append(token.split(":", 1)[1])
+            elif kind == _TAG_PROPS:
+                tag, _, props = token.partition("|")
+                values.append((tag, props.split(",")))
+            else:
+                values.append(token)
+        return tid
+
+    # RHS entries: >= 0 for a sub-rule, ~terminal_id (< 0) for a terminal
+    children: List[List[int]] = []
+    for lhs in names:
+        entries: List[int] = []
+        for sym in rules[lhs]:
+            if sym in index:
+                entries.append(index[sym])
+            else:
+                tid = terminal_id(sym)
+                if kinds[tid] != _OTHER:
+                    entries.append(~tid)
+        children.append(entries)
+    memo: List[Tuple[List[Token], List[Token]] | None] = [None] * len(names)
+    # Visited marks of the current walk, cleared again when it returns
+    seen = bytearray(len(names))
+
+    def mark_reach(x: int, visited: List[int]) -> None:
+        todo = [x]
+        while todo:
+            for c in children[todo.pop()]:
+                if c >= 0 and not seen[c]:
+                    seen[c] = 1
+                    visited.append(c)
+                    todo.append(c)
 
+    def walk(root: int) -> Tuple[List[Token], List[Token]]:
+        outs: Tuple[List[Token], List[Token]] = ([], [])
+        visited = [root]
+        seen[root] = 1
+        on_path = True
+        copied = -1  # sub-rule whose memo was copied and whose reach is not marked yet
+        stack = [iter(children[root])]
+        while stack:
+            for sym in stack[-1]:
+                if sym < 0:
+                    tid = ~sym
+                    kind = kinds[tid]
+                    if kind == _TAG_PROPS:
+                        tag, props = values[tid]
+                        outs[_TAG].append(tag)
+                        outs[_PROP].extend(props)
+                    else:
+                        outs[kind].append(values[tid])
+                    continue
+                if seen[sym]:
+                    continue
+                if copied >= 0:
+                    mark_reach(copied, visited)
+                    copied = -1
+                    if seen[sym]:
+                        continue
+                seen[sym] = 1
+                visited.append(sym)
+                done = memo[sym]
+                if on_path and done is not None and not cyclic:
+                    outs[_TAG].extend(done[_TAG])
+                    outs[_PROP].extend(done[_PROP])
+                    on_path = False
+                    copied = sym
+                    continue
+                stack.append(iter(children[sym]))
+                break
+            else:
+                stack.pop()
+                on_path = False
+        for x in visited:
+            seen[x] = 0
+        return outs
 
-def _terminals_for_rule(rule: str, rules: RuleMap) -> List[Token]:
-    return [t for t in _expand_rule(rule, rules) if t.startswith(("TAG:", "PROP:", "IMPORT:"))]
+    # Children before parents, so each walk can reuse sub-rule memos. A
+    # rule reaching itself (back edge to a rule on the current path) is not
+    # descended into again; walk() already treats it as visited. A memo
+    # copied into a walk on a cycle could then repeat the walk's own
+    # rules, so once one is found memos are no longer reused (each walk is
+    # still correct on its own).
+    cyclic = False
+    for root in range(len(names)):
+        stack = [root]
+        active: Set[int] = set()
+        while stack:
+            x = stack[-1]
+            if memo[x] is not None:
+                stack.pop()
+                continue
+            active.add(x)
+            pending = [c for c in children[x] if c >= 0 and memo[c] is None]
+            if pending:
+                unvisited = [c for c in pending if c not in active]
+                if len(unvisited) < len(pending):
+                    cyclic = True
+                if unvisited:
+                    stack.extend(unvisited)
+                    continue
+            stack.pop()
+            active.discard(x)
+            memo[x] = walk(x)
+    return dict(zip(names, memo))
 
 
 def suggestions_from_rules(rules: RuleMap) -> List[dict]:
@@ -40,30 +170,31 @@ def suggestions_from_rules(rules: RuleMap) -> List[dict]:
     - Suggests variants from member name differences
     """
     # Collect per-tag props via co-occurrence across rules
-    tag_to_props: Dict[str, Dict[str, int]] = {}
+    # (each occurrence of a tag in a rule counts every prop in that rule)
+    tag_to_props: DefaultDict[str, Counter] = defaultdict(Counter)
     tags_seen: Set[str] = set()
-    for rname in list(rules.keys()):
-        terminals = _terminals_for_rule(rname, rules)
-        tags = [t for t in terminals if t.startswith("TAG:")]
-        props = [p for p in terminals if p.startswith("PROP:")]
-        for tag in tags:
+    for tags, props in _rule_terminals(rules).values():
+        if not tags:
+            continue
+        prop_counts = Counter(props)
+        for tag, k in Counter(tags).items():
             tags_seen.add(tag)
-            tmap = tag_to_props.setdefault(tag, {})
-            for p in props:
-                name = p.split(":", 1)[1]
-                tmap[name] = tmap.get(name, 0) + 1
+            tmap = tag_to_props[tag]
+            if k == 1:
+                tmap.update(prop_counts)
+            else:
+                for name, n in prop_counts.items():
+                    tmap[name] += n * k
 
     # Group tags into families by base name
-    family_members: Dict[str, Set[str]] = {}
-    family_props: Dict[str, Dict[str, int]] = {}
+    family_members: DefaultDict[str, Set[str]] = defaultdict(set)
+    family_props: DefaultDict[str, Counter] = defaultdict(Counter)
     for tag in tags_seen:
         name = tag.split(":", 1)[1]
         base, variant_hints = base_name(name)
-        family_members.setdefault(base, set()).add(name)
+        family_members[base].add(name)
         # Merge props
-        fmap = family_props.setdefault(base, {})
-        for p, c in tag_to_props.get(tag, {}).items():
-            fmap[p] = fmap.get(p, 0) + c
+        family_props[base].update(tag_to_props[tag])
 
     # Build suggestions
     suggestions: List[dict] = []
@@ -78,7 +209,7 @@ def suggestions_from_rules(rules: RuleMap) -> List[dict]:
                 variant_names.add(m[len(base) :] or "default")
             else:
                 variant_names.add(m)
-        top_props = sorted(family_props.get(base, {}).items(), key=lambda kv: kv[1], reverse=True)[:10]
+        top_props = sorted(family_props[base].items(), key=lambda kv: kv[1], reverse=True)[:10]
         suggestions.append(
             {
                 "family": base,
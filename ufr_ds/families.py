@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import re
+from collections import Counter
 from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
 
-from .react_tokenizer import list_source_files, tokenize_file, TAG_OPEN_RE, PROP_RE
+from .react_tokenizer import ascii_twin, list_source_files, map_files, tag_props, tokenize_file, TAG_OPEN_RE, PROP_RE
+
+# TAG_OPEN_RE for PascalCase names only. A match spans a single '<', so
+# dropping the lowercase matches never uncovers a different component match.
+COMPONENT_OPEN_RE = re.compile(r"<\s*([A-Z][A-Za-z0-9_]*)[\s>/]")
+
+# Tag and prop patterns for (Unicode, ASCII-only) text; see ascii_twin
+_TAG_RES = (TAG_OPEN_RE, ascii_twin(TAG_OPEN_RE))
+_COMPONENT_RES = (COMPONENT_OPEN_RE, ascii_twin(COMPONENT_OPEN_RE))
+_PROP_RES = (PROP_RE, ascii_twin(PROP_RE))
 
 
 COMMON_PREFIXES = [
@@ -33,26 +45,36 @@ COMMON_SUFFIXES = [
     "Dialog",
 ]
 
+# Snapshots for the str.endswith/startswith tuple forms used by base_name
+_PREFIXES = tuple(COMMON_PREFIXES)
+_SUFFIXES = tuple(COMMON_SUFFIXES)
+
 
-def base_name(name: str) -> Tuple[str, List[str]]:
+@lru_cache(maxsize=None)
+def base_name(name: str) -> Tuple[str, Tuple[str, ...]]:
     """Compute a base name and variant hints from a component-like name.
 
     Heuristics:
     - If ends with a common suffix (e.g., IconButton, PrimaryButton), base is that suffix.
     - Else remove common prefixes (Primary, Secondary, Icon, etc.) to form base.
     - Return (base, variant_tokens)
+
+    Memoized: a project repeats a small set of tag names many times. The
+    hints are a tuple so a cached result cannot be changed by a caller.
     """
-    for suf in COMMON_SUFFIXES:
-        if name.endswith(suf) and name != suf:
-            prefix = name[: -len(suf)]
-            variants = [v for v in COMMON_PREFIXES if prefix.startswith(v)]
-            variant = prefix if prefix else ""
-            return suf, [variant] if variant else variants
+    # Most names match no affix at all. One tuple endswith/startswith call
+    # rules that out in C; the ordered scan only runs on a hit.
+    if name.endswith(_SUFFIXES):
+        for suf in _SUFFIXES:
+            if name.endswith(suf) and name != suf:
+                # name != suf, so the remaining prefix is never empty
+                return suf, (name[: -len(suf)],)
     # try strip prefixes
-    for pref in COMMON_PREFIXES:
-        if name.startswith(pref) and len(name) > len(pref):
-            return name[len(pref) :], [pref]
-    return name, []
+    if name.startswith(_PREFIXES):
+        for pref in _PREFIXES:
+            if name.startswith(pref) and len(name) > len(pref):
+                return name[len(pref) :], (pref,)
+    return name, ()
 
 
 @dataclass
@@ -61,35 +83,37 @@ class Element:
     props: List[str] = field(default_factory=list)
 
 
-def extract_elements_from_text(text: str) -> List[Element]:
+def extract_elements_from_text(text: str, components_only: bool = False) -> List[Element]:
     r"""Lightweight extraction of opening JSX tags and their prop names.
 
     This is a heuristic and may miss complex embedded expressions, but works well
     for common cases. It scans for opening tags and then collects \w-like prop names
-    before the next '>' or '/>'.
+    before the next '>' or '/>'. With `components_only`, only PascalCase tags are
+    returned (HTML tags are skipped by the regex itself).
+    """
+    ascii = text.isascii()
+    tag_re = (_COMPONENT_RES if components_only else _TAG_RES)[ascii]
+    return [Element(tag=tag, props=props) for tag, props in tag_props(text, tag_re, _PROP_RES[ascii])]
+
+
+def _extract_file_elements(path: Path, components_only: bool = False) -> List[Element]:
+    try:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        return []
+    return extract_elements_from_text(text, components_only)
+
+
+def extract_elements(root: Path, workers: int = 1, components_only: bool = False) -> List[Element]:
+    """Elements of every source file under `root`, in file order.
+
+    Files are scanned in `workers` processes when workers != 1 (0 means
+    one per CPU).
     """
-    elements: List[Element] = []
-    for m in TAG_OPEN_RE.finditer(text):
-        tag = m.group(1)
-        start = m.end(1)
-        # Scan ahead to the next closing angle bracket
-        end = text.find('>', start)
-        if end == -1:
-            end = len(text)
-        snippet = text[start:end]
-        props = [pm.group(1) for pm in PROP_RE.finditer(snippet)]
-        elements.append(Element(tag=tag, props=props))
-    return elements
-
-
-def extract_elements(root: Path) -> List[Element]:
+    extract = partial(_extract_file_elements, components_only=components_only)
     els: List[Element] = []
-    for file in list_source_files(root):
-        try:
-            text = file.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            continue
-        els.extend(extract_elements_from_text(text))
+    for file_els in map_files(extract, list_source_files(root), workers):
+        els.extend(file_els)
     return els
 
 
@@ -97,27 +121,23 @@ def extract_elements(root: Path) -> List[Element]:
 class Family:
     base: str
     members: Set[str] = field(default_factory=set)
-    props: Dict[str, int] = field(default_factory=dict)
+    props: Counter = field(default_factory=Counter)
     variants: Set[str] = field(default_factory=set)
 
-    def add_member(self, name: str, props: List[str], variant_hints: List[str]) -> None:
+    def add_member(self, name: str, props: List[str], variant_hints: Iterable[str]) -> None:
         self.members.add(name)
-        for p in props:
-            self.props[p] = self.props.get(p, 0) + 1
-        for v in variant_hints:
-            if v:
-                self.variants.add(v)
+        # Counted in C; first-seen order is kept, as top_props ties rely on it
+        self.props.update(props)
+        self.variants.update(v for v in variant_hints if v)
 
 
-def discover_families(root_dir: str | Path) -> Dict[str, Family]:
+def discover_families(root_dir: str | Path, workers: int = 1) -> Dict[str, Family]:
     root = Path(root_dir)
-    els = extract_elements(root)
+    # Only PascalCase tags are considered components
+    els = extract_elements(root, workers, components_only=True)
     families: Dict[str, Family] = {}
     for el in els:
         tag = el.tag
-        # Consider only PascalCase tags as components
-        if not tag or not tag[0].isupper():
-            continue
         b, variant_hints = base_name(tag)
         fam = families.setdefault(b, Family(base=b))
         fam.add_member(tag, el.props, variant_hints)
@@ -135,21 +155,23 @@ def family_suggestions(families: Dict[str, Family]) -> List[dict]:
             continue
         # Variant names inferred from member names
         variant_names: Set[str] = set()
+        blen = len(base)
         for m in fam.members:
             if m == base:
                 continue
             # derive likely variant token by removing base suffix/prefix
             if m.endswith(base):
-                variant_names.add(m[: -len(base)] or "default")
+                variant_names.add(m[:-blen] or "default")
             elif m.startswith(base):
-                variant_names.add(m[len(base) :] or "default")
+                variant_names.add(m[blen:] or "default")
             else:
                 # fallback to full name
                 variant_names.add(m)
         if fam.variants:
             variant_names.update(fam.variants)
-        # Prop shortlist: top-N props
-        top_props = sorted(fam.props.items(), key=lambda kv: kv[1], reverse=True)[:8]
+        # Prop shortlist: top-N props. most_common(n) selects with a heap and
+        # breaks count ties in insertion order, like the stable full sort.
+        top_props = fam.props.most_common(8)
         suggestions.append(
             {
                 "family": base,
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Dict, Optional
-from .llm import refine_component
+from typing import List, Dict, Optional, Tuple
+from .llm import refine_component, refine_components_batch
 from string import Template
 
 
@@ -42,9 +42,8 @@ def kebab_case(s: str) -> str:
     return ''.join(out)
 
 
-def write_component(out_dir: Path, name: str, variant_values: List[str], props: List[str], *, llm_provider: Optional[str] = None) -> Path:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    file = out_dir / f"{name}.tsx"
+def _render_component(name: str, variant_values: List[str], props: List[str]) -> Tuple[str, List[str]]:
+    """TSX skeleton for a component, and the sanitized variant values."""
     if not variant_values:
         variant_values = ["default"]
     # sanitize and dedupe
@@ -66,6 +65,13 @@ def write_component(out_dir: Path, name: str, variant_values: List[str], props:
         prop_params=prop_params,
         kebab=kebab_case(name),
     )
+    return content, variant_values
+
+
+def write_component(out_dir: Path, name: str, variant_values: List[str], props: List[str], *, llm_provider: Optional[str] = None) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    file = out_dir / f"{name}.tsx"
+    content, variant_values = _render_component(name, variant_values, props)
     # Optional LLM refinement
     refined = refine_component(name, variant_values, props, content, provider=llm_provider) if llm_provider else None
     file.write_text(refined or content, encoding="utf-8")
@@ -75,12 +81,20 @@ def write_component(out_dir: Path, name: str, variant_values: List[str], props:
 def generate_from_suggestions(suggestions: List[dict], out_dir: str | Path, *, llm_provider: Optional[str] = None) -> Dict[str, str]:
     out = {}
     out_path = Path(out_dir)
+    specs = []
     for s in suggestions:
         name = s.get("family") or "Component"
-        variants = list(s.get("suggested_variant_values") or [])
         props = list(s.get("top_props") or [])
-        path = write_component(out_path, name, variants, props, llm_provider=llm_provider)
-        out[name] = str(path)
+        content, variants = _render_component(name, list(s.get("suggested_variant_values") or []), props)
+        specs.append({"name": name, "variants": variants, "props": props, "base_tsx": content})
+    # All components are refined in one concurrent batch rather than one
+    # blocking round trip after another
+    refined = refine_components_batch(specs, llm_provider) if llm_provider else [None] * len(specs)
+    for spec, better in zip(specs, refined):
+        out_path.mkdir(parents=True, exist_ok=True)
+        path = out_path / f"{spec['name']}.tsx"
+        path.write_text(better or spec["base_tsx"], encoding="utf-8")
+        out[spec["name"]] = str(path)
     # Write an index.ts for convenience
     if out:
         index = out_path / "index.ts"
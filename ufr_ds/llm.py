@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import hashlib
 import os
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 
-def _openai_refine(prompt: str) -> Optional[str]:
+def _openai_refine(prompt: str, model: str, temperature: float) -> Optional[str]:
     try:
         import openai  # type: ignore
     except Exception:
@@ -15,16 +19,16 @@ def _openai_refine(prompt: str) -> Optional[str]:
     try:
         client = openai.OpenAI(api_key=api_key)  # newer SDK
         resp = client.chat.completions.create(
-            model=os.getenv("UFR_OPENAI_MODEL", "gpt-4o-mini"),
+            model=model,
             messages=[{"role": "user", "content": prompt}],
-            temperature=float(os.getenv("UFR_OPENAI_T", "0.2")),
+            temperature=temperature,
         )
         return resp.choices[0].message.content  # type: ignore
     except Exception:
         return None
 
 
-def _anthropic_refine(prompt: str) -> Optional[str]:
+def _anthropic_refine(prompt: str, model: str, temperature: float) -> Optional[str]:
     try:
         import anthropic  # type: ignore
     except Exception:
@@ -35,9 +39,9 @@ def _anthropic_refine(prompt: str) -> Optional[str]:
     try:
         client = anthropic.Anthropic(api_key=api_key)
         msg = client.messages.create(
-            model=os.getenv("UFR_ANTHROPIC_MODEL", "claude-3-5-sonnet-20240620"),
+            model=model,
             max_tokens=2000,
-            temperature=float(os.getenv("UFR_ANTHROPIC_T", "0.2")),
+            temperature=temperature,
             messages=[{"role": "user", "content": prompt}],
         )
         # anthropic SDK returns content blocks
@@ -49,6 +53,69 @@ def _anthropic_refine(prompt: str) -> Optional[str]:
         return None
 
 
+# Responses already fetched in this process, by cache key
+_MEMO: Dict[str, str] = {}
+
+
+def _cache_dir() -> Optional[Path]:
+    """On-disk response cache; UFR_LLM_CACHE moves it, UFR_LLM_NO_CACHE=1 disables it."""
+    if os.getenv("UFR_LLM_NO_CACHE"):
+        return None
+    return Path(os.getenv("UFR_LLM_CACHE", "~/.cache/ufr-ds/llm")).expanduser()
+
+
+def _cached(key: str, fetch: Callable[[], Optional[str]]) -> Optional[str]:
+    """Return the response stored under `key`, calling `fetch` on a miss.
+
+    Failures (None) are not cached, so a later run retries them.
+    """
+    cache_dir = _cache_dir()
+    if cache_dir is None:
+        return fetch()
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=20).hexdigest()
+    out = _MEMO.get(digest)
+    if out is not None:
+        return out
+    entry = cache_dir / f"{digest}.txt"
+    try:
+        out = entry.read_text(encoding="utf-8")
+    except (OSError, ValueError):  # missing or undecodable entry
+        out = fetch()
+        if out is None:
+            return None
+        # Written under a temporary name and renamed, so a concurrent run
+        # never reads a partial entry. The name is per process and thread:
+        # refine_components_batch may write the same key from two threads.
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(out, encoding="utf-8")
+            os.replace(tmp, entry)
+        except OSError:
+            pass
+    _MEMO[digest] = out
+    return out
+
+
+def _complete(prompt: str, provider: Optional[str]) -> Optional[str]:
+    """Send `prompt` to the provider, reusing cached responses.
+
+    The cache key covers provider, model and temperature as well as the
+    prompt, so changing any of them fetches a fresh response.
+    """
+    if provider == "openai":
+        fn = _openai_refine
+        model = os.getenv("UFR_OPENAI_MODEL", "gpt-4o-mini")
+        temperature = float(os.getenv("UFR_OPENAI_T", "0.2"))
+    elif provider == "anthropic":
+        fn = _anthropic_refine
+        model = os.getenv("UFR_ANTHROPIC_MODEL", "claude-3-5-sonnet-20240620")
+        temperature = float(os.getenv("UFR_ANTHROPIC_T", "0.2"))
+    else:
+        return None
+    return _cached(f"{provider}|{model}|{temperature}|{prompt}", lambda: fn(prompt, model, temperature))
+
+
 def refine_component(name: str, variants: List[str], props: List[str], base_tsx: str, provider: Optional[str] = None) -> Optional[str]:
     """Optionally refine a generated component via an LLM.
 
@@ -76,17 +143,27 @@ Provided skeleton:
 
 Return only the improved TSX file content.
 """
-    if provider == "openai":
-        return _openai_refine(prompt)
-    if provider == "anthropic":
-        return _anthropic_refine(prompt)
-    return None
+    return _complete(prompt, provider)
+
+
+def refine_components_batch(specs: List[dict], provider: Optional[str] = None, max_workers: int = 8) -> List[Optional[str]]:
+    """`refine_component` for many components, with the requests in flight together.
+
+    Each spec holds the refine_component arguments ("name", "variants",
+    "props", "base_tsx"). Results are in spec order, None where refinement
+    was unavailable. The provider SDKs block on network I/O, so a thread
+    pool overlaps the round trips; cached responses return immediately.
+    """
+    if provider not in ("openai", "anthropic") or not specs:
+        return [None] * len(specs)
+
+    def refine(spec: dict) -> Optional[str]:
+        return refine_component(spec["name"], spec["variants"], spec["props"], spec["base_tsx"], provider=provider)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(specs))) as ex:
+        return list(ex.map(refine, specs))
 
 
 def generate_text(prompt: str, provider: Optional[str] = None) -> Optional[str]:
     """Generic text generation for summaries via the selected provider."""
-    if provider == "openai":
-        return _openai_refine(prompt)
-    if provider == "anthropic":
-        return _anthropic_refine(prompt)
-    return None
+    return _complete(prompt, provider)
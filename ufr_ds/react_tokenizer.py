@@ -1,27 +1,146 @@
 from __future__ import annotations
 
+import codecs
+import hashlib
+import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Iterable, List, Tuple, Dict, Set
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Dict, Set, TypeVar
+
+T = TypeVar("T")
 
 
 JS_EXTS = {".js", ".jsx", ".ts", ".tsx"}
 
 
+# Build output and dependencies; same ignore list as tools/js-tokenizer
+SKIP_DIRS = {"node_modules", "dist", ".next", "build"}
+
+
 def list_source_files(root: Path) -> List[Path]:
+    """Source files under `root`, skipping SKIP_DIRS.
+
+    Walks with os.scandir, whose entries answer is_dir/is_file from the
+    directory read instead of a stat per path. Directories are visited
+    depth-first with each one's files listed before its subdirectories,
+    the order `root.rglob("*")` produced. Symlinked directories are not
+    descended into.
+    """
     files: List[Path] = []
-    for p in root.rglob("*"):
-        if p.is_file() and p.suffix in JS_EXTS:
-            files.append(p)
+    stack = [os.fspath(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs: List[str] = []
+        for e in entries:
+            if e.is_dir(follow_symlinks=False):
+                if e.name not in SKIP_DIRS:
+                    subdirs.append(e.path)
+            elif os.path.splitext(e.name)[1] in JS_EXTS and e.is_file():
+                files.append(Path(e.path))
+        stack.extend(reversed(subdirs))
     return files
 
 
+def map_files(fn: Callable[[Path], T], files: List[Path], workers: int = 1) -> Iterator[T]:
+    """Lazily yield `fn(f)` for each file, in `workers` processes when workers != 1.
+
+    0 means one process per CPU. Results keep file order, so output does
+    not depend on the worker count. `fn` must be a module-level function.
+    """
+    if workers == 1 or len(files) < 2:
+        yield from map(fn, files)
+        return
+    max_workers = workers if workers > 0 else (os.cpu_count() or 1)
+    chunksize = max(1, len(files) // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        yield from ex.map(fn, files, chunksize=chunksize)
+
+
 TAG_OPEN_RE = re.compile(r"<\s*([A-Za-z_][A-Za-z0-9_]*)[\s>/]")
 TAG_CLOSE_RE = re.compile(r"</\s*([A-Za-z_][A-Za-z0-9_]*)\s*>")
-PROP_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_-]*)\s*=\s*")
+# The name is taken whole through a lookahead (an atomic group): a shorter
+# prefix is always followed by another name character, never by `\s*=`, so
+# backtracking into it after a failed `=` could never succeed.
+PROP_RE = re.compile(r"\b(?=([A-Za-z_][A-Za-z0-9_-]*))\1\s*=\s*")
 IMPORT_NAMED_RE = re.compile(r"import\s*\{([^}]*)\}\s*from\s*['\"][^'\"]+['\"];?")
 IMPORT_DEFAULT_RE = re.compile(r"import\s+([A-Za-z_][A-Za-z0-9_]*)\s+from\s*['\"][^'\"]+['\"];?")
 
+# A character class, or a \s outside one
+_CLASS_OR_SPACE_RE = re.compile(r"\[(?:\\.|[^\]\\])*\]|\\s")
+
+
+def ascii_twin(rx: re.Pattern) -> re.Pattern:
+    r"""`rx` compiled with re.ASCII, for text where `str.isascii()` holds.
+
+    Unicode-aware \b and \s dominate the scan time of these patterns. On
+    ASCII text their ASCII forms agree, except that Unicode \s also
+    matches \x1c-\x1f; those are added to every \s so matches are
+    unchanged.
+    """
+
+    def widen(m: re.Match) -> str:
+        t = m.group()
+        return t.replace(r"\s", r"\s\x1c-\x1f") if t[0] == "[" else r"[\s\x1c-\x1f]"
+
+    return re.compile(_CLASS_OR_SPACE_RE.sub(widen, rx.pattern), (rx.flags & ~re.UNICODE) | re.ASCII)
+
+
+_PATTERNS = (IMPORT_DEFAULT_RE, IMPORT_NAMED_RE, TAG_OPEN_RE, TAG_CLOSE_RE, PROP_RE)
+_ASCII_PATTERNS = tuple(map(ascii_twin, _PATTERNS))
+
+
+class _FoldTable(dict):
+    """Non-ASCII char -> ASCII stand-in of the same regex class, built lazily."""
+
+    def __missing__(self, ch: str) -> str:
+        # Same tests sre uses for Unicode \s and \w. "#0" is a word char
+        # that can neither start nor extend a tag or prop name, as a
+        # non-ASCII letter could not; "#" keeps it from joining a name
+        # that ends right before it.
+        folded = " " if ch.isspace() else "#0" if ch.isalnum() or ch == "_" else "#"
+        self[ch] = folded
+        return folded
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def _fold_errors(exc: UnicodeEncodeError) -> Tuple[str, int]:
+    return "".join(map(_FOLD_TABLE.__getitem__, exc.object[exc.start : exc.end])), exc.end
+
+
+codecs.register_error("ufr_ds.fold", _fold_errors)
+
+
+def _fold_to_ascii(text: str) -> str:
+    """ASCII text on which the tag and prop patterns match the same names.
+
+    Those patterns only capture ASCII names; non-ASCII characters matter
+    to them only as Unicode whitespace or word characters. Each is swapped
+    for an ASCII character of the same kind, so the fast `ascii_twin`
+    patterns can scan non-ASCII sources too. The ASCII runs are copied by
+    the codec in C; only the non-ASCII runs reach the error handler.
+    """
+    return text.encode("ascii", "ufr_ds.fold").decode("ascii")
+
+
+def tag_props(text: str, tag_re: re.Pattern, prop_re: re.Pattern) -> Iterator[Tuple[str, List[str]]]:
+    """(tag, prop names) for each opening tag, props taken up to the next '>'."""
+    for m in tag_re.finditer(text):
+        start = m.end(1)
+        end = text.find(">", start)
+        if end == -1:
+            end = len(text)
+        yield m.group(1), prop_re.findall(text, start, end)
+
 
 HTML_TAGS: Set[str] = {
     # Common HTML tags to optionally downweight or skip; we keep them but can filter later
@@ -31,66 +150,179 @@ HTML_TAGS: Set[str] = {
 }
 
 
-def tokenize_file(path: Path) -> List[str]:
+def tokenize_file(
+    path: Path, compound_props: bool = False, emit_close: bool = False
+) -> Tuple[List[str], Dict[str, int]]:
+    """Tokens for one source file and their per-kind counts.
+
+    Counts use the `tokenize_project` keys ("tags", "components", "props")
+    and are taken from the per-kind lists, so no token is re-inspected.
+
+    With `compound_props`, each opening tag and the props written on it
+    become one token, "TAG:<name>|<prop>,<prop>" ("TAG:<name>" when it has
+    none), in place of the separate TAG and PROP tokens. Props outside a
+    tag are dropped and "props" counts those on tags.
+
+    "TAG_CLOSE:<name>" tokens are only emitted with `emit_close`. They
+    follow all of a file's opening tags rather than nesting with them, and
+    the Node tokenizer has no equivalent, so by default the closing-tag
+    scan is skipped.
+    """
     try:
         text = path.read_text(encoding="utf-8", errors="ignore")
     except Exception:
-        return []
-
-    tokens: List[str] = []
+        return [], {"tags": 0, "components": 0, "props": 0}
 
+    if text.isascii():
+        import_default_re, import_named_re = _ASCII_PATTERNS[:2]
+        markup = text
+    else:
+        # Named imports capture free text and run on the original; tags
+        # and props are scanned on its ASCII fold
+        import_default_re, import_named_re = _PATTERNS[:2]
+        markup = _fold_to_ascii(text)
+    tag_open_re, tag_close_re, prop_re = _ASCII_PATTERNS[2:]
+    # findall hands back the captured names straight from C; no match
+    # objects are built per hit.
     # Imports
-    for m in IMPORT_DEFAULT_RE.finditer(text):
-        name = m.group(1)
-        tokens.append(f"IMPORT:{name}")
-    for m in IMPORT_NAMED_RE.finditer(text):
-        names = [n.strip() for n in m.group(1).split(",") if n.strip()]
-        for name in names:
+    tokens: List[str] = ["IMPORT:" + name for name in import_default_re.findall(text)]
+    for group in import_named_re.findall(text):
+        for name in group.split(","):
             # Handle aliasing: X as Y
-            name = name.split(" as ")[0].strip()
+            name = name.strip().split(" as ")[0].strip()
             if name:
-                tokens.append(f"IMPORT:{name}")
+                tokens.append("IMPORT:" + name)
+    n_imports = len(tokens)
+
+    if compound_props:
+        n_props = 0
+        for tag, props in tag_props(markup, tag_open_re, prop_re):
+            n_props += len(props)
+            tokens.append("TAG:" + tag + "|" + ",".join(props) if props else "TAG:" + tag)
+        n_tags = len(tokens) - n_imports
+        if emit_close:
+            tokens += ["TAG_CLOSE:" + tag for tag in tag_close_re.findall(markup)]
+        return tokens, {"tags": n_tags, "components": n_imports, "props": n_props}
 
     # JSX tags
-    for m in TAG_OPEN_RE.finditer(text):
-        tag = m.group(1)
-        tokens.append(f"TAG:{tag}")
-    for m in TAG_CLOSE_RE.finditer(text):
-        tag = m.group(1)
-        tokens.append(f"TAG_CLOSE:{tag}")
+    tags = ["TAG:" + tag for tag in tag_open_re.findall(markup)]
+    tokens += tags
+    if emit_close:
+        tokens += ["TAG_CLOSE:" + tag for tag in tag_close_re.findall(markup)]
 
     # JSX props
-    for m in PROP_RE.finditer(text):
-        prop = m.group(1)
-        # Filter out likely non-prop assignments in code by simple heuristic: occurs near a '<'
-        # Keep all for now; engine can compress noise away
-        tokens.append(f"PROP:{prop}")
+    # Filter out likely non-prop assignments in code by simple heuristic: occurs near a '<'
+    # Keep all for now; engine can compress noise away
+    props = ["PROP:" + prop for prop in prop_re.findall(markup)]
+    tokens += props
+
+    return tokens, {"tags": len(tags), "components": n_imports, "props": len(props)}
+
+
+# On-disk cache of tokenize_file results: one entry per source path (and
+# mode), stamped with the file's mtime and size. A changed file overwrites
+# its entry instead of leaving the old one behind. Bump _CACHE_VERSION
+# when the entry or tokenize_file's output changes shape; edits to the
+# patterns themselves already change every key.
+_CACHE_VERSION = 2
+_CACHE_SALT = "|".join([str(_CACHE_VERSION)] + [rx.pattern for rx in _PATTERNS])
+
 
-    return tokens
+def token_cache_dir() -> Optional[Path]:
+    """Directory of the token cache, or None when caching is disabled.
+
+    The cache is opt-in: set UFR_TOKEN_CACHE to a directory (e.g.
+    ~/.cache/ufr-ds/tokens) to turn it on.
+    """
+    cache_dir = os.getenv("UFR_TOKEN_CACHE")
+    return Path(cache_dir).expanduser() if cache_dir else None
+
+
+def _tokenize_file_cached(
+    path: Path, cache_dir: Path, compound_props: bool = False, emit_close: bool = False
+) -> Tuple[List[str], Dict[str, int]]:
+    """`tokenize_file` through the cache; unchanged files are not re-read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return tokenize_file(path, compound_props, emit_close)
+    key = f"{_CACHE_SALT}|{int(compound_props)}{int(emit_close)}|{os.path.abspath(path)}"
+    stamp = [st.st_mtime_ns, st.st_size]
+    entry = cache_dir / (hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".json")
+    try:
+        cached_stamp, tokens, counts = json.loads(entry.read_text(encoding="utf-8"))
+        if cached_stamp == stamp:
+            return tokens, counts
+    except (OSError, ValueError, TypeError):
+        pass
+    result = tokenize_file(path, compound_props, emit_close)
+    # Written under a temporary name and renamed, so a concurrent run (or
+    # worker) never reads a partial entry
+    tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps([stamp, *result]), encoding="utf-8")
+        os.replace(tmp, entry)
+    except OSError:
+        pass
+    return result
 
 
-def tokenize_project(root_dir: str | Path) -> Tuple[List[str], Dict[str, int]]:
+def iter_tokens(
+    root_dir: str | Path,
+    counts: Optional[Dict[str, int]] = None,
+    workers: int = 1,
+    compound_props: bool = False,
+    emit_close: bool = False,
+) -> Iterator[str]:
+    """Yield a project's tokens file by file, in `tokenize_project` order.
+
+    Only one file's tokens are held at a time. When `counts` is given it is
+    updated in place as files are consumed, with the `tokenize_project`
+    keys, and is complete once the generator is exhausted. Per-file results
+    can be cached on disk (see `token_cache_dir`). See `tokenize_file` for
+    `compound_props` and `emit_close`.
+    """
+    if counts is not None:
+        for key in ("files", "tags", "components", "props"):
+            counts.setdefault(key, 0)
+    cache_dir = token_cache_dir()
+    if cache_dir is None:
+        tokenize = partial(tokenize_file, compound_props=compound_props, emit_close=emit_close)
+    else:
+        tokenize = partial(
+            _tokenize_file_cached, cache_dir=cache_dir, compound_props=compound_props, emit_close=emit_close
+        )
+    for toks, sub in map_files(tokenize, list_source_files(Path(root_dir)), workers):
+        if counts is not None:
+            counts["files"] += 1
+            counts["tags"] += sub["tags"]
+            counts["components"] += sub["components"]
+            counts["props"] += sub["props"]
+        # A project repeats a few thousand distinct tokens millions of
+        # times; interning keeps one str per distinct token, whichever path
+        # (tokenizer, cache or worker) produced it.
+        yield from map(sys.intern, toks)
+
+
+def tokenize_project(
+    root_dir: str | Path, workers: int = 1, compound_props: bool = False, emit_close: bool = False
+) -> Tuple[List[str], Dict[str, int]]:
     """Tokenize a React/TS project by extracting JSX tags, props, and imports.
 
     Returns a flat token sequence and basic counts for quick summaries.
+    Files are tokenized in `workers` processes when workers != 1 (0 means
+    one per CPU); tokens are merged in file order either way. With
+    `compound_props`, each tag's props are folded into its token, and
+    closing tags are only tokenized with `emit_close` (see
+    `tokenize_file`). Use `iter_tokens` to consume tokens without
+    building the list.
     """
-    root = Path(root_dir)
-    all_tokens: List[str] = []
     counts: Dict[str, int] = {
         "files": 0,
         "tags": 0,
         "components": 0,
         "props": 0,
     }
-
-    for file in list_source_files(root):
-        counts["files"] += 1
-        toks = tokenize_file(file)
-        all_tokens.extend(toks)
-
-    # Summaries
-    counts["tags"] = sum(1 for t in all_tokens if t.startswith("TAG:"))
-    counts["components"] = sum(1 for t in all_tokens if t.startswith("IMPORT:"))
-    counts["props"] = sum(1 for t in all_tokens if t.startswith("PROP:"))
+    all_tokens = list(iter_tokens(root_dir, counts, workers, compound_props, emit_close))
     return all_tokens, counts
-
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import json
+from io import StringIO
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Tuple, Optional
 
 from .llm import generate_text
 
@@ -12,26 +13,33 @@ def render_markdown_report(payload: dict) -> str:
     eng = payload.get("engine", {})
     pats = payload.get("patterns", {})
     fams = payload.get("families", {})
-    lines: List[str] = []
-    lines.append(f"# UFR Analysis Report\n")
-    lines.append(f"## Input\n")
-    lines.append(f"- Path: `{inp.get('path','')}`\n")
-    lines.append(f"- Files: {inp.get('files',0)}  Tokens: {inp.get('tokens',0)}\n")
-    lines.append(f"- Tags: {inp.get('tags',0)}  Props: {inp.get('props',0)}  Components: {inp.get('components',0)}\n")
-    lines.append(f"\n## Engine\n")
-    lines.append(f"- Compression ratio: {eng.get('compression_ratio')}\n")
-    lines.append(f"- MDL total: {eng.get('mdl_score')} (grammar: {eng.get('mdl_grammar_cost')}, data: {eng.get('mdl_data_cost')})\n")
-    lines.append(f"- Coverage: {eng.get('coverage')}  Lossless: {eng.get('valid_lossless')}\n")
-    lines.append(f"\n## Top Tags\n")
-    for name, count in (pats.get('top_tags') or [])[:10]:
-        lines.append(f"- {name}: {count}\n")
-    lines.append(f"\n## Top Props\n")
-    for name, count in (pats.get('top_props') or [])[:10]:
-        lines.append(f"- {name}: {count}\n")
-    lines.append(f"\n## Family Suggestions\n")
-    for s in (fams.get('suggestions') or [])[:20]:
-        lines.append(f"- {s.get('family')}: variants={s.get('suggested_variant_values')} props={s.get('top_props')} members={s.get('members')}\n")
-    return "".join(lines)
+    buf = StringIO()
+    w = buf.write
+    # Fixed sections are one template each; list sections are written as
+    # one joined block per section
+    w(
+        f"# UFR Analysis Report\n"
+        f"## Input\n"
+        f"- Path: `{inp.get('path','')}`\n"
+        f"- Files: {inp.get('files',0)}  Tokens: {inp.get('tokens',0)}\n"
+        f"- Tags: {inp.get('tags',0)}  Props: {inp.get('props',0)}  Components: {inp.get('components',0)}\n"
+        f"\n## Engine\n"
+        f"- Compression ratio: {eng.get('compression_ratio')}\n"
+        f"- MDL total: {eng.get('mdl_score')} (grammar: {eng.get('mdl_grammar_cost')}, data: {eng.get('mdl_data_cost')})\n"
+        f"- Coverage: {eng.get('coverage')}  Lossless: {eng.get('valid_lossless')}\n"
+        f"\n## Top Tags\n"
+    )
+    w("".join(f"- {name}: {count}\n" for name, count in (pats.get('top_tags') or [])[:10]))
+    w("\n## Top Props\n")
+    w("".join(f"- {name}: {count}\n" for name, count in (pats.get('top_props') or [])[:10]))
+    w("\n## Family Suggestions\n")
+    w(
+        "".join(
+            f"- {s.get('family')}: variants={s.get('suggested_variant_values')} props={s.get('top_props')} members={s.get('members')}\n"
+            for s in (fams.get('suggestions') or [])[:20]
+        )
+    )
+    return buf.getvalue()
 
 
 def render_llm_summary(payload: dict, provider: Optional[str]) -> Optional[str]:
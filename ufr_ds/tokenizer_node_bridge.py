@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import json
 import shutil
 import subprocess
+import tempfile
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from emergence_engine.jsonio import loads
 
 
 def has_node_tokenizer() -> bool:
@@ -13,25 +15,43 @@ def has_node_tokenizer() -> bool:
     return bool(node and script.exists())
 
 
-def tokenize_project_ast(root_dir: str | Path) -> Tuple[List[str], Dict[str, int]]:
+def iter_tokens_ast(root_dir: str | Path, counts: Optional[Dict[str, int]] = None) -> Iterator[str]:
+    """Yield tokens from the Node tokenizer while it is still running.
+
+    The script is run with --jsonl and prints one JSON array per file, so
+    tokens are decoded line by line instead of from one buffered blob.
+    When `counts` is given it is filled from the closing summary line, with
+    the `tokenize_project_ast` keys, once the generator is exhausted.
+    """
     root = Path(root_dir)
     script = Path("tools/js-tokenizer/index.js").resolve()
-    proc = subprocess.run(
-        ["node", str(script), str(root.resolve())],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=False,
-        text=True,
-    )
-    if proc.returncode != 0:
-        raise RuntimeError(f"Node tokenizer failed: {proc.stderr.strip()}")
-    data = json.loads(proc.stdout)
-    tokens = list(data.get("tokens", []))
-    counts = {
-        "files": int(data.get("files", 0)),
-        "tags": int(data.get("counts", {}).get("tags", 0)),
-        "props": int(data.get("counts", {}).get("props", 0)),
-        "components": int(data.get("counts", {}).get("components", 0)),
-    }
-    return tokens, counts
+    summary: dict = {}
+    # stderr goes to a file: a pipe nobody drains while stdout is being
+    # read could fill up and stall the child.
+    with tempfile.TemporaryFile() as err:
+        with subprocess.Popen(
+            ["node", str(script), str(root.resolve()), "--jsonl"],
+            stdout=subprocess.PIPE,
+            stderr=err,
+        ) as proc:
+            # Lines stay bytes: orjson (when installed) parses UTF-8
+            # directly, with no decode to str first
+            for line in proc.stdout:
+                if line.startswith(b"["):
+                    yield from loads(line)
+                elif line.strip():
+                    summary = loads(line)
+        if proc.returncode != 0:
+            err.seek(0)
+            raise RuntimeError(f"Node tokenizer failed: {err.read().decode('utf-8', 'replace').strip()}")
+    if counts is not None:
+        counts["files"] = int(summary.get("files", 0))
+        counts["tags"] = int(summary.get("counts", {}).get("tags", 0))
+        counts["props"] = int(summary.get("counts", {}).get("props", 0))
+        counts["components"] = int(summary.get("counts", {}).get("components", 0))
 
+
+def tokenize_project_ast(root_dir: str | Path) -> Tuple[List[str], Dict[str, int]]:
+    counts: Dict[str, int] = {}
+    tokens = list(iter_tokens_ast(root_dir, counts))
+    return tokens, counts